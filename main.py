@@ -1,15 +1,94 @@
-import pygame
-import sys
+import argparse
 import os
-from src.game import Game
-from src.utils.path_utils import resource_path
+import sys
+import time
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Jumping Ball Game")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate without a window or audio, as fast as possible")
+    parser.add_argument("--frames", type=int, default=3600,
+                        help="number of frames to simulate in headless mode")
+    parser.add_argument("--map", dest="map_id", default=None,
+                        help="official map id to play in headless mode (e.g. map1)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="world seed for headless mode (default: the official map's seed, else random)")
+    parser.add_argument("--level", dest="level_path", default=None,
+                        help=".jlvl level file to play in headless mode instead of a generated world")
+    parser.add_argument("--endless", action="store_true",
+                        help="in headless mode, climb with no goal height until the ball falls or the frames run out")
+    parser.add_argument("--analytic", action="store_true",
+                        help="in headless mode, jump over the ball's free flights analytically instead of stepping each frame")
+    parser.add_argument("--record", default=None,
+                        help="save the replay of the headless run to this file")
+    parser.add_argument("--replay", default=None,
+                        help="play back a replay file (in a window, or as fast as possible with --headless)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.headless:
+        # Use SDL's dummy drivers so no window or audio device is ever opened
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    import pygame
+    from src.game import Game
+    from src.world_generator import seed_for_map
+
+    # Initialize pygame
+    pygame.init()
 
-# Initialize pygame
-pygame.init()
+    if args.replay:
+        from src.replay import Replay
+        replay = Replay.load(args.replay)
+    
+    if args.headless and args.replay:
+        game = Game(headless=True)
+        start = time.perf_counter()
+        game.start_replay(replay)
+        frames = game.fast_forward(replay.frames, analytic=args.analytic)
+        elapsed = time.perf_counter() - start
+        print(f"Replayed {frames} of {replay.frames} frames in {elapsed:.3f}s, "
+              f"score: {game.current_score()}, reason: {game.state_manager.get_state_data('reason') or 'Still playing'}, "
+              f"seed: {replay.seed}")
+        pygame.quit()
+        return
+    
+    if args.headless:
+        game = Game(headless=True)
+        custom_settings = None
+        seed = args.seed
+        if args.map_id:
+            map_configs = game.renderer.map_selection_renderer.map_configs
+            if args.map_id not in map_configs:
+                print(f"Unknown map '{args.map_id}', choose from: {', '.join(map_configs)}")
+                return
+            custom_settings = map_configs[args.map_id]["config"]
+            if seed is None:
+                seed = seed_for_map(args.map_id)
+        if args.endless:
+            custom_settings = dict(custom_settings or {}, target_height=None)
+        start = time.perf_counter()
+        result = game.run_headless(args.frames, custom_settings=custom_settings, seed=seed,
+                                   level_path=args.level_path, analytic=args.analytic)
+        elapsed = time.perf_counter() - start
+        fps = result["frames"] / elapsed if elapsed > 0 else 0
+        print(f"Simulated {result['frames']} frames in {elapsed:.3f}s ({fps:.0f} frames/s), "
+              f"score: {result['score']}, reason: {result['reason'] or 'Still playing'}, seed: {result['seed']}")
+        if args.record:
+            game.save_replay(args.record)
+            print(f"Replay saved to {args.record} ({len(game.last_replay)} bytes)")
+        pygame.quit()
+        return
 
-def main():
-    game = Game()
+    from src.constants import FPS
+    game = Game(fps=FPS)
+    if args.replay:
+        game.start_replay(replay)
     game.run()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(sys.argv[1:])
@@ -0,0 +1,316 @@
+"""
+Batched ball simulation for Jumping Ball Game.
+Advances many balls in lockstep through one shared world: every ball's
+position, velocity, camera and flags live in NumPy arrays, and each step is a
+handful of array operations for all balls at once. Collisions are found by
+gathering, for each ball, the few platforms around its feet into an
+(balls x platforms) window and running the collision handler's tests on it.
+
+Each ball plays as if it had the world to itself. Moving platforms follow
+the frame count, not the balls, and regular, moving and dangerous platforms
+never bounce a ball that lands on them (see CollisionHandler), so the only
+per-ball platform state is how many jumps each disappearing platform has
+left. A batch of one ball steps exactly like Game.update.
+"""
+
+import numpy as np
+from src.collision_handler import LANDING_TOLERANCE, MAX_LANDING_RISE
+from src.map import ACTIVATION_MARGIN, PLATFORM_GENERATION_BUFFER, CULL_MARGIN
+from src.platform import HAZARD, DURABILITY, COOLDOWN, has_component
+from src.reachability import BOUNCE_MULTIPLIER
+from src.replay import INPUT_LEFT, INPUT_RIGHT, INPUT_UP, INPUT_TOGGLE_AUTO_JUMP
+
+# Per-step friction on the ball's sideways speed (see Player.update)
+FRICTION = 0.9
+
+# Auto-jump cooldowns set by a jump and by a bounce (see Player.jump / Player.bounce)
+JUMP_COOLDOWN = 10
+BOUNCE_COOLDOWN = 2
+
+# How a ball's run ended, by code
+PLAYING = 0
+FALL = 1
+DANGER = 2
+VICTORY = 3
+REASONS = (None, "Fall", "Danger", "Victory")
+
+class BallBatch:
+    """N balls advanced in lockstep through the world of one game"""
+
+    def __init__(self, game, count):
+        """
+        Args:
+            game (Game): Game set up by init_game; its map is shared by every ball,
+                and its player gives the start position and physics
+            count (int): Number of balls
+        """
+        self.game = game
+        self.map = game.current_map
+        self.count = count
+        player = game.player
+        self.radius = player.radius
+        self.gravity = player.gravity
+        self.jump_strength = player.jump_strength
+        self.move_speed = player.move_speed
+
+        self.x = np.full(count, player.x, dtype=np.float64)
+        self.y = np.full(count, player.y, dtype=np.float64)
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+        self.vel_x = np.full(count, player.vel_x, dtype=np.float64)
+        self.vel_y = np.full(count, player.vel_y, dtype=np.float64)
+        self.on_ground = np.full(count, player.on_ground)
+        self.auto_jump = np.full(count, player.auto_jump_enabled)
+        self.cooldown = np.full(count, player.auto_jump_cooldown, dtype=np.int64)
+        self.camera_y = np.full(count, game.camera_y, dtype=np.float64)
+
+        self.reason = np.zeros(count, dtype=np.int8) # PLAYING until the run ends
+        self.frames = np.zeros(count, dtype=np.int64) # Steps each ball has played
+        self.frame = 0
+
+        # Jumps each ball has left on the disappearing platforms it has touched, by platform id
+        self.jumps_left = {}
+
+    @property
+    def playing(self):
+        """Mask of balls whose run hasn't ended"""
+        return self.reason == PLAYING
+
+    def scores(self):
+        """Height each ball's camera has climbed (the score of its run)"""
+        return np.abs(self.map.origin_y + self.camera_y.astype(np.int64))
+
+    def results(self):
+        """One run_headless-style result per ball: frames played, score and end reason"""
+        return [{"frames": frames, "score": score, "reason": REASONS[reason]}
+                for frames, score, reason in zip(self.frames.tolist(), self.scores().tolist(),
+                                                 self.reason.tolist())]
+
+    def step(self, bits):
+        """
+        Advance every ball still playing by one step
+
+        Args:
+            bits (array or int): Input bits (see src/replay.py) held by each ball this step
+        """
+        active = np.flatnonzero(self.playing)
+        if not active.size:
+            return
+        bits = np.broadcast_to(np.asarray(bits), (self.count,))[active]
+        self.frame += 1
+        self.frames[active] += 1
+        self.game.sim_clock.advance(self.game.step_ms)
+
+        # Game.update: auto-jump toggles, then Player.handle_input
+        toggle = (bits & INPUT_TOGGLE_AUTO_JUMP) != 0
+        self.auto_jump[active] ^= toggle
+        vel_x = self.vel_x[active]
+        vel_x = np.where(bits & INPUT_LEFT, -self.move_speed, vel_x)
+        vel_x = np.where(bits & INPUT_RIGHT, self.move_speed, vel_x)
+        vel_y = self.vel_y[active]
+        on_ground = self.on_ground[active]
+        cooldown = self.cooldown[active]
+        auto_jump = self.auto_jump[active]
+        jump = ((bits & INPUT_UP) != 0) & on_ground & ~auto_jump
+        vel_y = np.where(jump, -self.jump_strength, vel_y)
+        on_ground &= ~jump
+        cooldown = np.where(jump, JUMP_COOLDOWN, cooldown)
+
+        # Player.update
+        x0 = self.x[active]
+        y0 = self.y[active]
+        vel_y = vel_y + self.gravity
+        x = x0 + vel_x
+        y = y0 + vel_y
+        vel_x = vel_x * FRICTION
+        cooldown = np.where(cooldown > 0, cooldown - 1, cooldown)
+        jump = auto_jump & on_ground & (cooldown <= 0)
+        vel_y = np.where(jump, -self.jump_strength, vel_y)
+        on_ground &= ~jump
+        cooldown = np.where(jump, JUMP_COOLDOWN, cooldown)
+
+        # Wrap around the screen edges
+        width = self.game.width
+        x = np.where(x < 0, width, np.where(x > width, 0, x))
+
+        # Scroll each ball's camera and check for falls off the bottom of its screen
+        camera_y = self.camera_y[active]
+        threshold = self.game.height // 3
+        screen_y = y - camera_y
+        camera_y = np.where(screen_y < threshold, camera_y - (threshold - screen_y), camera_y)
+        reason = np.where(y - camera_y > self.game.height + self.radius, FALL, PLAYING).astype(np.int8)
+
+        self._advance_world(camera_y)
+
+        # Collisions for balls that aren't rising fast
+        checked = np.flatnonzero(vel_y >= -MAX_LANDING_RISE)
+        if checked.size:
+            hit_rows, tops = self._contacts(x0[checked], y0[checked], x[checked], y[checked], active[checked])
+            landed = hit_rows >= 0
+            if landed.any():
+                hit = checked[landed]
+                rows = hit_rows[landed]
+                # Player.land
+                y[hit] = tops[landed] - self.radius
+                vel_y[hit] = 0
+                on_ground[hit] = True
+                # Platforms without a bounce cooldown bounce the ball, and durable
+                # ones use up one of its jumps there
+                kind = self.map.store.kind[rows]
+                bounced = hit[~has_component(kind, COOLDOWN)]
+                vel_y[bounced] = -self.jump_strength * BOUNCE_MULTIPLIER
+                on_ground[bounced] = False
+                cooldown[bounced] = BOUNCE_COOLDOWN
+                durable = has_component(kind, DURABILITY)
+                self._use_jumps(rows[durable], active[hit[durable]])
+                reason[hit[has_component(kind, HAZARD)]] = DANGER
+
+        goal_y = self.map.goal_y()
+        if goal_y is not None:
+            reason[camera_y <= goal_y] = VICTORY
+
+        self.prev_x[active] = x0
+        self.prev_y[active] = y0
+        self.x[active] = x
+        self.y[active] = y
+        self.vel_x[active] = vel_x
+        self.vel_y[active] = vel_y
+        self.on_ground[active] = on_ground
+        self.cooldown[active] = cooldown
+        self.camera_y[active] = camera_y
+        self.reason[active] = reason
+
+    def run(self, policy, frames):
+        """
+        Step until every run has ended or `frames` steps have passed
+
+        Args:
+            policy (callable): policy(batch) -> input bits for each ball, as step() takes
+            frames (int): Maximum number of steps
+
+        Returns:
+            list: results()
+        """
+        for _ in range(frames):
+            if not self.playing.any():
+                break
+            self.step(policy(self))
+        return self.results()
+
+    def _advance_world(self, camera_y):
+        """Map.update for every camera at once: step, cull and generate for the whole spread of balls"""
+        current_map = self.map
+        store = current_map.store
+        top = camera_y.min()
+        bottom = camera_y.max()
+        store.update(self.game.sim_clock.get_ticks(), top - ACTIVATION_MARGIN,
+                     bottom + self.game.height + ACTIVATION_MARGIN)
+
+        # Only what is below every ball's screen can go
+        cull_y = bottom + self.game.height + CULL_MARGIN
+        culled = store.index.rows_from(cull_y)
+        if culled.size:
+            for platform_id in store.ids[culled].tolist():
+                self.jumps_left.pop(platform_id, None)
+            store.remove_below(cull_y)
+        while len(current_map.loaded_chunks) > 1 and current_map.chunk_top(current_map.loaded_chunks[0]) >= cull_y:
+            current_map.loaded_chunks.pop(0)
+
+        current_map.ensure_platforms(top - PLATFORM_GENERATION_BUFFER)
+
+    def _contacts(self, x0, y0, x1, y1, balls):
+        """
+        Platform each ball lands on this step (CollisionHandler.check_platform_collisions)
+
+        Returns:
+            tuple: (store row for each ball, -1 for none; platform top for each ball)
+        """
+        store = self.map.store
+        width = self.game.width
+        radius = self.radius
+        # Measure the motion from the matching point when the ball wrapped around
+        x0 = np.where(x1 - x0 > width / 2, x0 + width, np.where(x0 - x1 > width / 2, x0 - width, x0))
+        foot0 = y0 + radius
+        foot1 = y1 + radius
+        lo = np.minimum(foot0 - 2, foot1 - LANDING_TOLERANCE)
+        hi = foot1 + 2
+
+        none = np.full(len(balls), -1, dtype=np.intp), np.zeros(len(balls))
+        rows = store.rows_in_range(lo.min(), hi.max())
+        if not rows.size:
+            return none
+        store.sync(rows)
+
+        # Each ball's platforms are a run of the rows, which are sorted by y
+        ys = store.y[rows]
+        start = np.searchsorted(ys, lo, side="left")
+        end = np.searchsorted(ys, hi, side="right")
+        span = (end - start).max()
+        if span <= 0:
+            return none
+        window = start[:, None] + np.arange(span)[None, :]
+        valid = window < end[:, None]
+        window = rows[np.minimum(window, rows.size - 1)]
+
+        top = store.y[window]
+        left = store.x[window]
+        plat_width = store.width[window]
+        x0 = x0[:, None]
+        x1 = x1[:, None]
+        y1 = y1[:, None]
+        foot0 = foot0[:, None]
+        foot1 = foot1[:, None]
+
+        # Resting contact, exactly as the collision handler tests it
+        resting = foot1 >= top - 2
+        resting &= ((foot1 > top) &
+                    (y1 - radius < top + store.height[window]) &
+                    (x1 + radius > left) &
+                    (x1 - radius < left + plat_width))
+        resting &= (foot1 >= top) & (foot1 <= top + LANDING_TOLERANCE)
+
+        # Swept contact
+        fall = foot1 - foot0
+        crossing = (foot0 <= top) & (foot1 >= top)
+        impact_t = np.where(fall > 0, (top - foot0) / np.where(fall > 0, fall, 1), 0.0)
+        impact_x = x0 + (x1 - x0) * impact_t
+        prev_left = store.prev_x[window]
+        left_at_impact = prev_left + (left - prev_left) * impact_t
+        crossing &= ((impact_x + radius > left_at_impact) &
+                     (impact_x - radius < left_at_impact + plat_width))
+
+        candidates = (resting | crossing) & valid & ~self._spent(window, balls)
+        impact_t = np.where(crossing, impact_t, 0.0)
+
+        # The platform hit first; ties go to the highest one
+        first = np.where(candidates, impact_t, np.inf)
+        first_t = first.min(axis=1)
+        tied_top = np.where(candidates & (first == first_t[:, None]), top, np.inf)
+        choice = np.argmin(tied_top, axis=1)
+        picked = np.arange(len(balls))
+        hit = candidates.any(axis=1)
+        return np.where(hit, window[picked, choice], -1), top[picked, choice]
+
+    def _spent(self, window, balls):
+        """Mask of (ball, platform) pairs where the ball has used up a disappearing platform"""
+        spent = np.zeros(window.shape, dtype=bool)
+        if not self.jumps_left:
+            return spent
+        store = self.map.store
+        durable = has_component(store.kind[window], DURABILITY)
+        for row in np.unique(window[durable]).tolist():
+            jumps = self.jumps_left.get(store.ids[row].item())
+            if jumps is not None:
+                spent |= (window == row) & (jumps[balls] <= 0)[:, None]
+        return spent
+
+    def _use_jumps(self, rows, balls):
+        """Take one jump off each ball's count for the disappearing platform it landed on"""
+        store = self.map.store
+        for row, ball in zip(rows.tolist(), balls.tolist()):
+            platform_id = store.ids[row].item()
+            jumps = self.jumps_left.get(platform_id)
+            if jumps is None:
+                jumps = self.jumps_left[platform_id] = np.full(self.count, store.jumps_remaining[row],
+                                                                dtype=np.int16)
+            jumps[ball] -= 1
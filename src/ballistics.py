@@ -0,0 +1,208 @@
+"""
+Analytic flight solver for Jumping Ball Game.
+Between contacts the ball only falls under constant gravity, with either a
+held direction key (constant sideways speed) or geometric friction on its
+sideways speed. Its whole flight can therefore be computed at once, and the
+next step on which anything can happen - a platform contact, wrapping round
+the screen edge, falling off screen, reaching the goal or moving the origin -
+found by testing every step of the flight against the nearby platforms in one
+vectorized pass. Game.skip_flight jumps straight to the step before that event
+and lets the regular Game.update handle the event itself.
+
+The skipped state matches frame stepping bit for bit: trajectories are built
+with cumulative sums and products (the same sequence of additions and
+multiplications Player.update performs), the camera is scrolled with the same
+arithmetic, and dormant platforms are brought up to date in closed form, as
+they already are when they wake up. Contact tests are widened by EPSILON so
+they can only stop a skip early, never let it pass through a landing.
+"""
+
+import numpy as np
+from src.collision_handler import LANDING_TOLERANCE, MAX_LANDING_RISE
+from src.map import ACTIVATION_MARGIN, PLATFORM_GENERATION_BUFFER, CULL_MARGIN, REBASE_DISTANCE
+from src.platform import MOTION, has_component
+from src.platform_store import advance_moving
+from src.constants import SCREEN_WIDTH
+from src.replay import INPUT_LEFT, INPUT_RIGHT
+
+# Steps of flight solved at once (longer flights are skipped in several parts)
+MAX_FLIGHT_STEPS = 240
+
+# Per-step friction on the ball's sideways speed (see Player.update)
+FRICTION = 0.9
+
+# Slack (px) added to every contact test
+EPSILON = 1e-6
+
+class Flight:
+    """The ball's state over the next steps of a flight, index 0 being the current step"""
+
+    def __init__(self, player, bits, steps):
+        """
+        Args:
+            player (Player): Ball in the air (not on_ground)
+            bits (int): Input bits held for the whole flight
+            steps (int): Number of steps to solve
+        """
+        self.steps = steps
+        # Player.update: vel_y += gravity, then y += vel_y
+        self.vel_y = np.cumsum(np.concatenate(([player.vel_y], np.full(steps, player.gravity))))
+        self.y = np.cumsum(np.concatenate(([player.y], self.vel_y[1:])))
+
+        # Player.handle_input sets vel_x each step while a direction is held
+        # (right wins over left); then x += vel_x and vel_x *= FRICTION
+        if bits & (INPUT_LEFT | INPUT_RIGHT):
+            speed = player.move_speed if bits & INPUT_RIGHT else -player.move_speed
+            x_steps = np.full(steps, speed, dtype=np.float64)
+            self.vel_x = np.full(steps + 1, speed * FRICTION)
+            self.vel_x[0] = player.vel_x
+        else:
+            self.vel_x = np.cumprod(np.concatenate(([player.vel_x], np.full(steps, FRICTION))))
+            x_steps = self.vel_x[:steps]
+        self.x = np.cumsum(np.concatenate(([player.x], x_steps)))
+
+def _scroll_camera(game, flight):
+    """
+    Camera position after each step, and the first step on which something other
+    than free flight happens (steps + 1 if none)
+    """
+    threshold = game.height // 3
+    fall_y = game.height + game.player.radius
+    goal_y = game.current_map.goal_y()
+    # Game.update moves the origin once the camera gets this far up
+    stop_y = -REBASE_DISTANCE if goal_y is None else max(goal_y, -REBASE_DISTANCE)
+
+    camera = [game.camera_y]
+    camera_y = game.camera_y
+    for step, (x, y) in enumerate(zip(flight.x[1:].tolist(), flight.y[1:].tolist()), 1):
+        # The same arithmetic as Game.update, so the camera ends up bit for bit the same
+        screen_y = y - camera_y
+        if screen_y < threshold:
+            camera_y -= threshold - screen_y
+        camera.append(camera_y)
+        if (x < 0 or x > game.width # Wraps round the screen edge
+                or y - camera_y > fall_y # Falls off the bottom
+                or camera_y <= stop_y): # Reaches the goal or moves the origin
+            return np.array(camera), step
+    return np.array(camera), flight.steps + 1
+
+def _first_contact(game, flight, camera, steps):
+    """First step in 1..steps on which the collision handler may find a platform (steps + 1 if none)"""
+    player = game.player
+    store = game.current_map.store
+    radius = player.radius
+    feet = flight.y[:steps + 1] + radius
+
+    # Steps on which the collision handler looks for platforms at all
+    checked = flight.vel_y[1:steps + 1] >= -MAX_LANDING_RISE - EPSILON
+    if not checked.any():
+        return steps + 1
+
+    # Every platform the feet pass during the flight, tested at every step at once
+    rows = store.rows_in_range(feet.min() - LANDING_TOLERANCE - 2, feet.max() + 2)
+    if not rows.size:
+        return steps + 1
+    store.sync(rows)
+    top = store.y[rows][:, None]
+    height = store.height[rows][:, None]
+    width = store.width[rows][:, None]
+
+    # Platform x at each step; moving platforms follow their closed-form motion
+    frames = np.arange(steps + 1)[None, :]
+    left = np.broadcast_to(store.x[rows][:, None], (rows.size, steps + 1))
+    moving = has_component(store.kind[rows], MOTION)
+    if moving.any():
+        left = left.copy()
+        left[moving], _ = advance_moving(store.x[rows][moving][:, None], store.speed[rows][moving][:, None],
+                                         store.direction[rows][moving][:, None],
+                                         SCREEN_WIDTH - store.width[rows][moving][:, None], frames)
+    left0 = left[:, :-1]
+    left1 = left[:, 1:]
+    # A stepped platform keeps its previous x for the swept test; a dormant one is
+    # synced on the spot (prev_x = x). Platforms are stepped inside the activation band
+    band = ((top >= camera[None, 1:steps + 1] - ACTIVATION_MARGIN) &
+            (top <= camera[None, 1:steps + 1] + game.height + ACTIVATION_MARGIN))
+    static_prev = store.prev_x[rows][:, None]
+    prev_left = np.where(moving[:, None], np.where(band, left0, left1), static_prev)
+
+    x0 = flight.x[None, :steps]
+    x1 = flight.x[None, 1:steps + 1]
+    y1 = flight.y[None, 1:steps + 1]
+    foot0 = feet[None, :-1]
+    foot1 = feet[None, 1:]
+
+    # Resting contact (see CollisionHandler.check_platform_collisions), widened by EPSILON
+    resting = ((foot1 >= top - EPSILON) & (foot1 <= top + LANDING_TOLERANCE + EPSILON) &
+               (y1 - radius < top + height + EPSILON) &
+               (x1 + radius > left1 - EPSILON) & (x1 - radius < left1 + width + EPSILON))
+
+    # Swept contact: overlap at the time the feet cross the platform top
+    fall = foot1 - foot0
+    crossing = (foot0 <= top + EPSILON) & (foot1 >= top - EPSILON)
+    impact_t = np.clip(np.where(fall > 0, (top - foot0) / np.where(fall > 0, fall, 1), 0.0), 0.0, 1.0)
+    impact_x = x0 + (x1 - x0) * impact_t
+    left_at_impact = prev_left + (left1 - prev_left) * impact_t
+    crossing &= ((impact_x + radius > left_at_impact - EPSILON) &
+                 (impact_x - radius < left_at_impact + width + EPSILON))
+
+    contact = (resting | crossing).any(axis=0) & checked
+    hits = np.flatnonzero(contact)
+    return hits[0].item() + 1 if hits.size else steps + 1
+
+def plan_skip(game, bits, max_steps):
+    """
+    Number of steps that are pure flight from the current state, with `bits` held
+
+    Returns:
+        tuple: (steps that can be skipped, Flight, camera positions), or (0, None, None)
+    """
+    player = game.player
+    if player.on_ground or max_steps < 1:
+        return 0, None, None
+    steps = min(max_steps, MAX_FLIGHT_STEPS)
+    flight = Flight(player, bits, steps)
+    camera, event = _scroll_camera(game, flight)
+    # Everything the flight can meet has to be in the store before it is tested.
+    # Adding platforms early doesn't change the run (see Map._add_platform)
+    game.current_map.ensure_platforms(camera.min() - PLATFORM_GENERATION_BUFFER)
+    contact = _first_contact(game, flight, camera, event - 1)
+    return min(event, contact) - 1, flight, camera
+
+def apply_skip(game, flight, camera, steps):
+    """Put the game in the state frame stepping reaches after `steps` steps of the flight"""
+    player = game.player
+    current_map = game.current_map
+    store = current_map.store
+
+    player.prev_x = flight.x[steps - 1].item()
+    player.prev_y = flight.y[steps - 1].item()
+    player.x = flight.x[steps].item()
+    player.y = flight.y[steps].item()
+    player.vel_x = flight.vel_x[steps].item()
+    player.vel_y = flight.vel_y[steps].item()
+    if player.auto_jump_cooldown > 0:
+        player.auto_jump_cooldown = max(0, player.auto_jump_cooldown - steps)
+    if player.shoot_cooldown > 0:
+        player.shoot_cooldown = max(0, player.shoot_cooldown - steps)
+    player.landing_sound_played = False
+
+    game.prev_camera_y = camera[steps - 1].item()
+    if camera[steps] != game.camera_y:
+        game.camera_y = camera[steps].item()
+        game.state_manager.set_state_data("score", game.current_score())
+
+    # One advance per step, so the clock accumulates the same rounding
+    for _ in range(steps):
+        game.sim_clock.advance(game.step_ms)
+    store.skip_frames(steps, game.sim_clock.get_ticks())
+
+    # Cull in the same order Map.update would have, one step at a time
+    cull = camera[1:steps + 1] + game.height + CULL_MARGIN
+    rows = store.index.rows_from(cull[-1])
+    if rows.size:
+        culled_on = np.searchsorted(-cull, -store.y[rows], side="left")
+        for row in rows[np.argsort(culled_on, kind="stable")].tolist():
+            store.remove(row)
+    while (len(current_map.loaded_chunks) > 1 and
+           current_map.chunk_top(current_map.loaded_chunks[0]) >= cull[-1]):
+        current_map.loaded_chunks.pop(0)
@@ -0,0 +1,77 @@
+"""
+Chunk prefetcher for Jumping Ball Game.
+Generates upcoming world chunks on a background thread so the frame that
+needs a chunk only has to splice in finished data.
+"""
+
+import queue
+import threading
+
+class ChunkPrefetcher:
+    """Background worker building chunks ahead of the camera"""
+
+    def __init__(self, generator):
+        """
+        Args:
+            generator (WorldGenerator): Generator the chunks are built with
+        """
+        self.generator = generator
+        self.requests = queue.Queue() # Chunk indices to build (None stops the worker)
+        self.results = queue.Queue() # Finished chunks
+        self.ready = {} # Finished chunks collected by the main thread, by index
+        self.pending = set() # Indices requested but not collected yet
+        self.last_taken = -1 # Chunks are taken in increasing index order
+        self.sync_generated = 0 # Chunks that were needed before the worker finished them
+
+        self.thread = threading.Thread(target=self._work, name="chunk-prefetcher", daemon=True)
+        self.thread.start()
+
+    def _work(self):
+        """Worker loop: build each requested chunk and hand it back"""
+        while True:
+            index = self.requests.get()
+            if index is None:
+                return
+            self.results.put(self.generator.generate_chunk(index))
+
+    def request(self, index):
+        """Ask the worker to build a chunk if it isn't built or on its way already"""
+        if index > self.last_taken and index not in self.pending and index not in self.ready:
+            self.pending.add(index)
+            self.requests.put(index)
+
+    def _collect(self):
+        """Move finished chunks from the worker into `ready` without blocking"""
+        while True:
+            try:
+                chunk = self.results.get_nowait()
+            except queue.Empty:
+                return
+            self.pending.discard(chunk.index)
+            # Chunks already generated on the main thread are no longer needed
+            if chunk.index > self.last_taken:
+                self.ready[chunk.index] = chunk
+
+    def take(self, index):
+        """
+        Get a chunk, generating it on the calling thread if the worker hasn't finished it
+
+        Chunks depend only on the seed and index, so both paths give the same chunk
+        """
+        self._collect()
+        chunk = self.ready.pop(index, None)
+        if chunk is None:
+            chunk = self.generator.generate_chunk(index)
+            self.sync_generated += 1
+        self.last_taken = max(self.last_taken, index)
+        return chunk
+
+    def rewind(self, index):
+        """Start taking chunks again from just above `index` (after a snapshot is restored)"""
+        self.last_taken = index
+        self.ready = {key: chunk for key, chunk in self.ready.items() if key > index}
+
+    def close(self):
+        """Stop the worker thread, waiting for the chunk it is building"""
+        self.requests.put(None)
+        self.thread.join()
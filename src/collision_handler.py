@@ -1,6 +1,14 @@
 import pygame
-from src.platform import DangerousPlatform, DisappearingPlatform
+import numpy as np
+from src.platform import HAZARD
 from src.game_state import GameState
+from src import game_clock
+
+# How far (px) the player's feet may sink into a platform top and still land on it
+LANDING_TOLERANCE = 15
+
+# Collisions are ignored while the ball rises faster than this (px per step)
+MAX_LANDING_RISE = 2
 
 class CollisionHandler:
     def __init__(self, game):
@@ -11,49 +19,81 @@ class CollisionHandler:
         if not self.game.player or not self.game.current_map:
             return
 
-        # Reset all platform collision flags
-        for platform in self.game.current_map.platforms:
-            # Don't reset platform.colliding here, let platforms manage their own state
-            pass
+        player = self.game.player
+        store = self.game.current_map.store
 
-        # Get platforms the player might be colliding with
-        colliding_platforms = []
-        for platform in self.game.current_map.platforms:
-            # Only check for collision if we're falling onto a platform
-            # Small modification: allow collision if player is at peak of jump (vel_y near zero)
-            # or falling (vel_y positive), but not when rising quickly
-            if self.game.player.vel_y < -2:  # Only avoid collision when player is rising quickly
-                continue
-                
-            # Ensure the player's feet are at or below the top of the platform
-            # This makes the collision detection more forgiving
-            foot_y = self.game.player.y + self.game.player.radius
-            if foot_y < platform.y - 2:  # Small tolerance
-                continue
-            
-            # Complete collision check - AABB with circle
-            if (self.game.player.y + self.game.player.radius > platform.y and 
-                self.game.player.y - self.game.player.radius < platform.y + platform.height and
-                self.game.player.x + self.game.player.radius > platform.x and 
-                self.game.player.x - self.game.player.radius < platform.x + platform.width):
-                
-                # Check if the player is falling onto the platform (not rising through it)
-                # Increased tolerance for better bouncing
-                if foot_y >= platform.y and foot_y <= platform.y + 15:  # 15 pixels of tolerance
-                    colliding_platforms.append(platform)
-                    platform.colliding = True  # Set collision flag for visualization
+        # Only check for collision if we're falling onto a platform
+        # Small modification: allow collision if player is at peak of jump (vel_y near zero)
+        # or falling (vel_y positive), but not when rising quickly
+        if player.vel_y < -MAX_LANDING_RISE:  # Only avoid collision when player is rising quickly
+            return
+
+        # The ball's motion over the last step. If it wrapped around the screen edge,
+        # measure the motion from the matching point on the other side
+        x0, y0 = player.prev_x, player.prev_y
+        x1, y1 = player.x, player.y
+        if x1 - x0 > self.game.width / 2:
+            x0 += self.game.width
+        elif x0 - x1 > self.game.width / 2:
+            x0 -= self.game.width
+        foot0 = y0 + player.radius
+        foot1 = y1 + player.radius
+
+        # Get platforms the player might be colliding with: only those whose top lies
+        # between the feet's start and end positions (plus tolerance), via the Y index
+        rows = store.rows_in_range(min(foot0 - 2, foot1 - LANDING_TOLERANCE), foot1 + 2)
+        store.sync(rows)
+        top = store.y[rows]
+        left = store.x[rows]
+        width = store.width[rows]
+
+        # Resting contact: the end position overlaps the platform top
+        # Ensure the player's feet are at or below the top of the platform
+        # This makes the collision detection more forgiving
+        resting = foot1 >= top - 2  # Small tolerance
+
+        # Complete collision check - AABB with circle
+        resting &= ((foot1 > top) &
+                    (y1 - player.radius < top + store.height[rows]) &
+                    (x1 + player.radius > left) &
+                    (x1 - player.radius < left + width))
+
+        # Check if the player is falling onto the platform (not rising through it)
+        # Increased tolerance for better bouncing
+        resting &= (foot1 >= top) & (foot1 <= top + LANDING_TOLERANCE)
+
+        # Swept contact: the feet crossed the platform top during the step. Find the
+        # time of impact along the motion and test the overlap at that moment, using
+        # where a moving platform was at the same time. This catches fast falls
+        # that would otherwise pass straight through a platform in one step
+        fall = foot1 - foot0
+        crossing = (foot0 <= top) & (foot1 >= top)
+        impact_t = np.where(fall > 0, (top - foot0) / np.where(fall > 0, fall, 1), 0.0)
+        impact_x = x0 + (x1 - x0) * impact_t
+        prev_left = store.prev_x[rows]
+        left_at_impact = prev_left + (left - prev_left) * impact_t
+        crossing &= ((impact_x + player.radius > left_at_impact) &
+                     (impact_x - player.radius < left_at_impact + width))
+
+        # Platforms the ball was already resting in count as touched at the start
+        candidates = resting | crossing
+        impact_t = np.where(crossing, impact_t, 0.0)
+        colliding_rows = rows[candidates]
         
         # Handle collision with the highest platform if there are multiple
-        if colliding_platforms:
-            # Find the highest platform (lowest y value)
-            highest_platform = min(colliding_platforms, key=lambda p: p.y)
+        if colliding_rows.size:
+            store.mark_colliding(colliding_rows, game_clock.get_ticks())  # Set collision flag for visualization
+            
+            # Land on the platform hit first; ties go to the highest one (lowest y value)
+            order = np.lexsort((top[candidates], impact_t[candidates]))
+            highest_platform = store.handle(colliding_rows[order[0]].item())
             
             # Debug info
             if self.game.debug_mode:
                 print(f"Collision with platform {highest_platform.id} at world Y: {highest_platform.y}")
             
             # Place player on top of platform and set on_ground
-            self.game.player.land(highest_platform.y)
+            player.land(highest_platform.y)
             
             # Handle platform special effects
             self.handle_platform_effect(highest_platform)
@@ -72,15 +112,15 @@ class CollisionHandler:
             # Play jump sound when player bounces
             self.game.sound_manager.play_game_sound("jump")
         
-        # Handle platform type specific effects
-        if isinstance(platform, DangerousPlatform):
+        # Effects of the platform's components
+        store = self.game.current_map.store
+        if store.has(platform.row, HAZARD):
             # Play die sound
             self.game.sound_manager.play_game_sound("die")
             # Game over on dangerous platform
             self.game.state_manager.change_state(GameState.GAME_OVER, 
-                                        score=abs(int(self.game.camera_y)), 
+                                        score=self.game.current_score(), 
                                         reason="Danger")
-        elif isinstance(platform, DisappearingPlatform):
-            # Check if platform should be removed
-            if platform.should_remove():
-                self.game.current_map.platforms.remove(platform) 
\ No newline at end of file
+        elif store.worn_out(platform.row):
+            # Worn-out platforms are removed
+            self.game.current_map.remove_platform(platform) 
\ No newline at end of file
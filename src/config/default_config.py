@@ -4,7 +4,8 @@
 WINDOW = {
     "width": 800,
     "height": 600,
-    "fps": 60,
+    "fps": 60,  # Render rate cap (0 = uncapped)
+    "physics_fps": 60,  # Fixed simulation rate; physics constants are tuned per step at this rate
     "title": "Jumping Ball Game",
     "fullscreen": False
 }
@@ -75,6 +76,13 @@ MAP = {
     "platform_count_per_generation": 5
 }
 
+# Ghost of the best earlier run on an official map, drawn during play (G toggles it)
+GHOST = {
+    "enabled": True,
+    "color": COLORS["black"],
+    "alpha": 90  # 0 = invisible, 255 = opaque
+}
+
 # Debug settings
 DEBUG = {
     "enabled_default": False,
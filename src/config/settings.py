@@ -73,6 +73,9 @@ def get_window_height():
 def get_fps():
     return get_setting('WINDOW', 'fps')
 
+def get_physics_fps():
+    return get_setting('WINDOW', 'physics_fps', 60)
+
 def get_color(name):
     return get_setting('COLORS', name)
 
@@ -9,10 +9,6 @@ import pygame
 # Import resource_path from utility module
 from src.utils.path_utils import resource_path
 
-# Initialize pygame mixer if it hasn't been already
-if not pygame.mixer.get_init():
-    pygame.mixer.init()
-
 # Base path for sound assets relative to the project root
 SOUND_BASE_PATH = os.path.join("assets", "audio", "sounds")
 
@@ -3,12 +3,13 @@ Constants module for backward compatibility.
 This file provides the same constants as before but now sources them from the new configuration system.
 """
 
-from src.config.settings import get_window_width, get_window_height, get_fps, get_color, get_player_setting, get_platform_setting
+from src.config.settings import get_window_width, get_window_height, get_fps, get_physics_fps, get_color, get_player_setting, get_platform_setting
 
 # Game constants
 SCREEN_WIDTH = get_window_width()
 SCREEN_HEIGHT = get_window_height()
 FPS = get_fps()
+PHYSICS_FPS = get_physics_fps()
 
 # Colors
 WHITE = get_color('white')
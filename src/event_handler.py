@@ -1,6 +1,8 @@
 import pygame
 from src.game_state import GameState
 from src.config.settings import update_setting, get_setting
+from src.world_generator import seed_for_map
+from src.replay import KEYFRAME_INTERVAL
 
 class EventHandler:
     def __init__(self, game):
@@ -205,10 +207,8 @@ class EventHandler:
                 selected_map_key = self.game.selected_official_map
                 if selected_map_key in self.game.official_map_configs:
                     map_config = self.game.official_map_configs[selected_map_key]
-                    # Store the selected official map config for retry
-                    self.game.state_manager.set_state_data("last_map_settings", map_config)
-                    self.game.state_manager.set_state_data("last_map_id", selected_map_key) # Store map_id for high scores
-                    self.game.init_game(custom_settings=map_config)
+                    self.game.init_game(custom_settings=map_config, seed=seed_for_map(selected_map_key),
+                                        map_id=selected_map_key)
                     self.game.state_manager.change_state(GameState.PLAYING)
                 return 
 
@@ -225,18 +225,14 @@ class EventHandler:
                 selected_map_key = self.game.selected_official_map
                 if selected_map_key in self.game.official_map_configs:
                     map_config = self.game.official_map_configs[selected_map_key]
-                    self.game.state_manager.set_state_data("last_map_settings", map_config)
-                    self.game.state_manager.set_state_data("last_map_id", selected_map_key) # Store map_id
-                    self.game.init_game(custom_settings=map_config)
+                    self.game.init_game(custom_settings=map_config, seed=seed_for_map(selected_map_key),
+                                        map_id=selected_map_key)
                     self.game.state_manager.change_state(GameState.PLAYING)
 
     def handle_custom_maps_event(self, event): # Changed from handle_custom_maps_events
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             mouse_pos = event.pos
             if "play" in self.game.custom_map_buttons and self.game.custom_map_buttons["play"].collidepoint(mouse_pos):
-                # Store the custom map config for retry
-                self.game.state_manager.set_state_data("last_map_settings", self.game.custom_map_settings.copy())
-                self.game.state_manager.set_state_data("last_map_id", "custom") # Store map_id
                 self.game.init_game(custom_settings=self.game.custom_map_settings)
                 self.game.state_manager.change_state(GameState.PLAYING)
                 return
@@ -270,8 +266,6 @@ class EventHandler:
             if event.key == pygame.K_ESCAPE:
                 self.game.state_manager.change_state(GameState.MAP_SELECT)
             elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                self.game.state_manager.set_state_data("last_map_settings", self.game.custom_map_settings.copy())
-                self.game.state_manager.set_state_data("last_map_id", "custom") # Store map_id
                 self.game.init_game(custom_settings=self.game.custom_map_settings)
                 self.game.state_manager.change_state(GameState.PLAYING)
 
@@ -285,12 +279,17 @@ class EventHandler:
             #     self.game.toggle_debug()
             elif event.key == pygame.K_j: 
                 if self.game.player: # Ensure player exists
-                    enabled = self.game.player.toggle_auto_jump()
-                    status = "enabled" if enabled else "disabled"
-                    # print(f"Auto-jump {status}") # Reduce console spam, handled by visual
-                    self.game.show_auto_jump_message = True
-                    self.game.auto_jump_message_time = pygame.time.get_ticks()
-                    self.game.auto_jump_status = enabled
+                    # Applied by Game.update on the next step so it is recorded with the input
+                    self.game.pending_auto_jump_toggle = True
+            elif event.key == pygame.K_g:
+                # Show or hide the ghost of the best earlier run
+                self.game.show_ghost = not self.game.show_ghost
+            elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                # Seek a played-back replay one keyframe back or forward
+                replay_player = self.game.replay_player
+                if replay_player and self.game.input_provider is replay_player:
+                    step = KEYFRAME_INTERVAL if event.key == pygame.K_PAGEDOWN else -KEYFRAME_INTERVAL
+                    self.game.seek_replay(max(0, replay_player.frame + step))
                     
     def _handle_pause_menu_event(self, event): # Changed from _handle_pause_menu_events
         if event.type == pygame.KEYDOWN:
@@ -351,13 +350,14 @@ class EventHandler:
             action = buttons[selected]["action"]
             
             if action == "try_again":
-                # Get last game settings if available
-                last_settings = self.game.state_manager.get_state_data("last_map_settings")
-                if last_settings:
-                    self.game.init_game(custom_settings=last_settings)
+                run = self.game.retry_run()
+                if run.get("map_id") and self.game.start_snapshot:
+                    # Same world and settings: go straight back to the first step, playing
+                    self.game.restore(self.game.start_snapshot)
                 else:
-                    self.game.init_game()  # Start with default settings
-                self.game.state_manager.change_state(GameState.PLAYING)
+                    # Usually built already while the Game Over screen was up
+                    self.game.init_game(**run)
+                    self.game.state_manager.change_state(GameState.PLAYING)
                 self.game.sound_manager.play_game_sound("restart")
             elif action == "main_menu":
                 self.game.state_manager.change_state(GameState.MAIN_MENU)
@@ -450,7 +450,7 @@ class EventHandler:
             self.game.apply_audio_settings()
             
             # Play a test sound when moving the sfx slider
-            if slider_key == 'sfx_volume' and not pygame.mixer.get_busy():
+            if slider_key == 'sfx_volume' and pygame.mixer.get_init() and not pygame.mixer.get_busy():
                 self.game.sound_manager.play_ui_sound("hover")
     
     def _handle_menu_selection(self):
@@ -1,32 +1,90 @@
 import pygame
+import io
 import sys
-from src.constants import WHITE, BLACK, SCREEN_WIDTH, SCREEN_HEIGHT, GREEN, BLUE, YELLOW, RED
+from collections import defaultdict
+from src.constants import WHITE, BLACK, SCREEN_WIDTH, SCREEN_HEIGHT, GREEN, BLUE, YELLOW, RED, PHYSICS_FPS
 from src.game_state import GameState, StateManager
-from src.player import Player
-from src.map import Map
-from src.platform import Platform, MovingPlatform, DisappearingPlatform, DangerousPlatform
+from src.map import REBASE_DISTANCE
 from src.renderers.base_renderer import BaseRenderer
 from src.event_handler import EventHandler
 from src.collision_handler import CollisionHandler
 from src.config.settings import get_setting, update_setting
-from src.sound_manager import SoundManager
+from src.sound_manager import SoundManager, NullSoundManager
+from src.game_clock import RealClock, VirtualClock, set_clock
+from src.replay import ReplayWriter, ReplayPlayer, input_bits, INPUT_TOGGLE_AUTO_JUMP, INPUT_SHOOT
+from src.ballistics import plan_skip, apply_skip
+from src.ghost import GhostRecorder, GhostPlayer, ghost_path, best_score
+from src.snapshot import take_snapshot, restore_snapshot
+from src.run_preparer import RunPreparer
+from src.projectiles import ProjectilePool
+from src.world_generator import seed_for_map
+
+# Input state used when no keyboard is attached (headless runs)
+NO_KEYS = defaultdict(bool)
+
+# Longest real frame time fed into the simulation; a longer stall (window drag,
+# breakpoint) drops time instead of running a burst of catch-up steps
+MAX_FRAME_MS = 250
 
 class Game:
-    def __init__(self, width=800, height=600, fps=60):
-        # Initialize pygame mixer for sound
-        pygame.mixer.init()
-        
+    def __init__(self, width=800, height=600, fps=60, headless=False):
         # Game window settings
         self.width = width
         self.height = height
         self.fps = fps
+        self.headless = headless
         
-        # Setup game window
-        fullscreen = get_setting('WINDOW', 'fullscreen', False)
-        flags = pygame.FULLSCREEN if fullscreen else 0
-        self.screen = pygame.display.set_mode((self.width, self.height), flags)
-        pygame.display.set_caption("Jumping Ball Game")
-        self.clock = pygame.time.Clock()
+        if headless:
+            # No window, no mixer and no wall clock: draw to an off-screen
+            # surface and let the simulation advance a virtual clock
+            self.screen = pygame.Surface((self.width, self.height))
+            self.clock = VirtualClock()
+        else:
+            # Initialize pygame mixer for sound (without an audio device the game runs silently)
+            try:
+                pygame.mixer.init()
+            except pygame.error:
+                pass
+            
+            # Setup game window
+            fullscreen = get_setting('WINDOW', 'fullscreen', False)
+            flags = pygame.FULLSCREEN if fullscreen else 0
+            self.screen = pygame.display.set_mode((self.width, self.height), flags)
+            pygame.display.set_caption("Jumping Ball Game")
+            self.clock = RealClock()
+        
+        # Fixed simulation step, independent of the render rate. The simulation
+        # keeps its own virtual clock that advances exactly one step per update,
+        # so gameplay timers behave the same at any frame rate or in headless runs
+        self.physics_fps = PHYSICS_FPS
+        self.step_ms = 1000.0 / self.physics_fps
+        self.accumulator = 0.0
+        self.render_alpha = 1.0  # Interpolation factor between the last two steps
+        self.sim_clock = VirtualClock()
+        set_clock(self.sim_clock)
+        
+        # Optional callable returning the key state for a frame (None = keyboard)
+        self.input_provider = None
+        
+        # Auto-jump toggle requested by a key press, applied on the next simulation step
+        self.pending_auto_jump_toggle = False
+        
+        # Every run's input is recorded so it can be replayed
+        self.replay_writer = None
+        self.last_replay = None # Encoded replay of the last finished run
+        self.replay_player = None # Replay being played back, if any
+        self.replay_snapshots = {} # Snapshots taken at the played replay's keyframes, by step
+        
+        # Official map being played (None for custom maps), and its ghost
+        self.map_id = None
+        self.ghost = None # GhostPlayer of the best earlier run, raced against
+        self.ghost_recorder = None # Samples this run in case it becomes the new ghost
+        self.show_ghost = get_setting('GHOST', 'enabled', True)
+        self.start_snapshot = None # Snapshot of an official map run's first step, for a quick retry
+        
+        # Settings the current run was started with, and the next run built ahead of time
+        self.run_settings = None
+        self.run_preparer = RunPreparer(self)
         
         # Initialize state management
         self.state_manager = StateManager()
@@ -35,9 +93,16 @@ class Game:
         self.player = None
         self.current_map = None
         self.camera_y = 0
+        self.prev_camera_y = 0
         
-        # Initialize sound manager
-        self.sound_manager = SoundManager(self)
+        # Shots fired by the player, in one pool reused by every run
+        self.projectiles = ProjectilePool()
+        
+        # Initialize sound manager (silent in headless runs or without an audio device)
+        if headless or not pygame.mixer.get_init():
+            self.sound_manager = NullSoundManager(self)
+        else:
+            self.sound_manager = SoundManager(self)
         
         # Initialize audio settings
         self.audio_settings = {
@@ -108,93 +173,88 @@ class Game:
         """Process all game events using the event handler"""
         self.event_handler.handle_events()
     
-    def init_game(self, custom_settings=None):
+    def init_game(self, custom_settings=None, seed=None, level_path=None, map_id=None):
         """
         Initialize game objects for a new game
         
         Args:
             custom_settings (dict, optional): Custom settings for the game
+            seed (int, optional): World seed; a random one is chosen if not given
+            level_path (str, optional): .jlvl level file to load the platform layout from
+                instead of generating it
+            map_id (str, optional): Official map being played, to race its ghost
         """
-        # Create player with default or custom settings
-        if custom_settings:
-            # Apply custom settings to player
-            player_speed = custom_settings.get("player_speed", 5)
-            jump_strength = custom_settings.get("jump_strength", 10)
-            self.player = Player(self.width // 2, self.height - 100, 
-                                speed=player_speed, 
-                                jump_strength=jump_strength)
-            
-            # Pass gravity to player
-            gravity = custom_settings.get("gravity", 0.5)
-            self.player.gravity = gravity
-            
-            # Reset player with new settings
-            self.player.reset(x=self.width // 2, y=self.height - 100)
-        else:
-            # Use default settings
-            if self.player is None:
-                self.player = Player(self.width // 2, self.height - 100)
-            else:
-                # Reset existing player
-                self.player.reset(x=self.width // 2, y=self.height - 100)
-        
-        # Reset player physics properties
-        self.player.vel_x = 0
-        self.player.vel_y = 0
-        self.player.is_jumping = False
-        self.player.on_ground = False
-        self.player.landing_sound_played = False
-        self.player.auto_jump_cooldown = 0
-        
-        # Set game reference in player for sound effects
-        self.player.set_game(self)
-        
-        # Create map with default or custom settings
-        if custom_settings:
-            # Create map with custom settings
-            platform_density = custom_settings.get("platform_density", 2.0)
-            moving_pct = custom_settings.get("moving_platform_pct", 25)
-            disappearing_pct = custom_settings.get("disappearing_platform_pct", 15)
-            dangerous_pct = custom_settings.get("dangerous_platform_pct", 10)
-            platform_gen_count = custom_settings.get("platform_count_per_generation", 10)
-            
-            self.current_map = Map(
-                platform_density=platform_density,
-                moving_platform_pct=moving_pct,
-                disappearing_platform_pct=disappearing_pct,
-                dangerous_platform_pct=dangerous_pct,
-                platform_count_per_generation=platform_gen_count
-            )
-        else:
-            self.current_map = Map(platform_count_per_generation=10)
+        # Swap in the player and map prepared while a menu was up, or build them
+        # now; the last run's player and platform store are reused for the next one
+        self.run_preparer.recycle(self.player, self.current_map)
+        self.player, self.current_map = self.run_preparer.take(custom_settings, seed, level_path)
+        self.run_settings = dict(custom_settings) if custom_settings else None
         
-        # Clear existing platforms
-        self.current_map.platforms.clear()
-        
-        # Set game reference in map for sound effects
-        self.current_map.set_game(self)
-            
-        # Generate initial platforms
-        self.current_map.generate_map()
+        # Every run starts its clock at zero: timers fire on whole milliseconds,
+        # so a run (and its replay) must not depend on how long earlier runs took
+        self.sim_clock.time_ms = 0
         
         # Reset camera position
         self.camera_y = 0
+        self.prev_camera_y = 0
+        self.projectiles.clear()
         
         # Initialize score
         self.state_manager.set_state_data("score", 0)
         
+        # Remember the world seed so the run can be reproduced
+        self.state_manager.set_state_data("seed", self.current_map.seed)
+        
         # Store custom settings in state data if provided
         if custom_settings:
             self.state_manager.set_state_data("custom_settings", custom_settings)
+        
+        # Start recording the run's input
+        self.pending_auto_jump_toggle = False
+        self.replay_snapshots = {}
+        self.replay_writer = ReplayWriter(io.BytesIO(), self.current_map.seed, settings=custom_settings,
+                                          level_path=level_path, physics_fps=self.physics_fps)
+        
+        # Race the best earlier run on an official map, and record this one
+        self.close_ghost()
+        self.map_id = map_id
+        self.ghost_recorder = None
+        if map_id and not self.headless:
+            self.ghost = GhostPlayer.open(ghost_path(map_id))
+            self.ghost_recorder = GhostRecorder()
+            self.ghost_recorder.record(0, self.player.x, self.player.y)
+        
+        # Taken on the run's first step, once it is playing (see update)
+        self.start_snapshot = None
             
         # Play game start sound
         self.sound_manager.play_game_sound("game_start")
     
     def update(self):
-        """Update game state"""
+        """Advance the game state by one fixed simulation step"""
         if self.state_manager.is_state(GameState.PLAYING):
+            # Retrying an official map goes back to its first step instead of rebuilding everything
+            if self.map_id and self.start_snapshot is None:
+                self.start_snapshot = self.snapshot()
+            # Keep the state at each keyframe of a played replay to seek back to
+            replay_player = self.replay_player
+            if replay_player and self.input_provider is replay_player and replay_player.at_keyframe:
+                self.replay_snapshots[replay_player.frame] = self.snapshot()
+            self.sim_clock.advance(self.step_ms)
             if self.player and self.current_map:
-                keys = pygame.key.get_pressed()
+                # Remember where the camera was for render interpolation
+                self.prev_camera_y = self.camera_y
+                
+                keys = self.read_input()
+                
+                # Key presses that toggle auto-jump take effect here, in step with the
+                # rest of the input, so replays apply them on the same step
+                toggle_auto_jump = self.pending_auto_jump_toggle
+                self.pending_auto_jump_toggle = False
+                self.replay_writer.record(input_bits(keys, toggle_auto_jump))
+                if toggle_auto_jump:
+                    self.toggle_auto_jump()
+                
                 self.player.handle_input(keys)
                 self.player.update() # Player position (world) updated by physics
 
@@ -215,7 +275,10 @@ class Game:
                     # The previous self.player.y += camera_shift was an attempt to keep player screen-relative,
                     # but it's better if player.y is pure world and camera adjusts around it.
 
-                    self.state_manager.set_state_data("score", abs(int(self.camera_y)))
+                    self.state_manager.set_state_data("score", self.current_score())
+                
+                # Move shots and drop the ones that left the screen
+                self.projectiles.update(self.camera_y, self.camera_y + self.height, self.width)
                 
                 # Check if player has fallen off the bottom of the screen
                 player_screen_y_for_fall_check = self.player.y - self.camera_y
@@ -223,18 +286,241 @@ class Game:
                     # Player died, play death sound
                     self.player.die(reason="Fall")
                     self.state_manager.change_state(GameState.GAME_OVER, 
-                                                 score=abs(int(self.camera_y)), 
+                                                 score=self.current_score(), 
                                                  reason="Fall")
                 
                 self.current_map.update(self.camera_y)
                 self.collision_handler.check_platform_collisions() # Use collision handler
                 
-                if self.camera_y <= self.current_map.target_height:
+                goal_y = self.current_map.goal_y()
+                if goal_y is not None and self.camera_y <= goal_y:
                     # Level complete, play completion sound
                     self.sound_manager.play_game_sound("level_complete")
                     self.state_manager.change_state(GameState.GAME_OVER, 
-                                                 score=abs(int(self.camera_y)), 
+                                                 score=self.current_score(), 
                                                  reason="Victory")
+                
+                if self.ghost_recorder:
+                    self.ghost_recorder.record(self.replay_writer.frame, self.player.x,
+                                               self.current_map.origin_y + self.player.y)
+                
+                # Move the origin up with the camera before coordinates grow large
+                if self.camera_y <= -REBASE_DISTANCE and self.state_manager.is_state(GameState.PLAYING):
+                    self.rebase_origin()
+                
+                # The run is over: keep its replay
+                if not self.state_manager.is_state(GameState.PLAYING):
+                    self.finish_replay()
+                    self.save_ghost()
+                    # Hand control back to the keyboard once a played-back run ends
+                    if self.input_provider is self.replay_player:
+                        self.input_provider = None
+    
+    def rebase_origin(self):
+        """
+        Shift the world so the camera is back near y = 0
+        
+        The camera, player and platforms all move by the same whole number of
+        pixels; the map keeps the shift in its origin, so the score and the goal
+        still count from the start of the climb
+        """
+        shift = int(self.camera_y)
+        self.current_map.rebase(shift)
+        self.camera_y -= shift
+        self.prev_camera_y -= shift
+        self.player.y -= shift
+        self.player.prev_y -= shift
+        self.projectiles.shift_y(-shift)
+    
+    def current_score(self):
+        """Height climbed so far: how far the camera is above the start of the climb"""
+        return abs(self.current_map.origin_y + int(self.camera_y))
+    
+    def snapshot(self):
+        """Snapshot of the current run's state (see src/snapshot.py)"""
+        return take_snapshot(self)
+    
+    def restore(self, snapshot):
+        """Go back to a snapshot of the current run and carry on playing from there"""
+        restore_snapshot(self, snapshot)
+        # Shots only exist on screen, so snapshots don't keep them
+        self.projectiles.clear()
+        # The ghost is closed once a run ends
+        if self.map_id and not self.headless and self.ghost is None:
+            self.ghost = GhostPlayer.open(ghost_path(self.map_id))
+    
+    def retry_run(self):
+        """init_game arguments that play the run that just ended again (see Try Again)"""
+        # Official maps always replay the same world, against the same ghost
+        if self.map_id in getattr(self, 'official_map_configs', {}):
+            return {"custom_settings": self.run_settings, "seed": seed_for_map(self.map_id), "map_id": self.map_id}
+        return {"custom_settings": self.run_settings}
+    
+    def prepare_next_run(self):
+        """Build the run the current menu starts on Enter ahead of time, so starting it is a swap"""
+        state = self.state_manager.current_state
+        if state == GameState.OFFICIAL_MAPS:
+            map_id = getattr(self, 'selected_official_map', None)
+            configs = getattr(self, 'official_map_configs', {})
+            if map_id in configs:
+                self.run_preparer.prepare(configs[map_id], seed_for_map(map_id))
+        elif state == GameState.CUSTOM_MAPS:
+            if hasattr(self, 'custom_map_settings'):
+                self.run_preparer.prepare(self.custom_map_settings)
+        elif state == GameState.GAME_OVER:
+            # Official maps go back to their start snapshot instead
+            if not (self.map_id and self.start_snapshot):
+                run = self.retry_run()
+                self.run_preparer.prepare(run["custom_settings"], run.get("seed"))
+    
+    def close_ghost(self):
+        """Stop playing the current ghost"""
+        if self.ghost:
+            self.ghost.close()
+            self.ghost = None
+    
+    def save_ghost(self):
+        """Keep the run that just ended as its map's ghost if it beat the stored one"""
+        recorder, self.ghost_recorder = self.ghost_recorder, None
+        if recorder is None:
+            return
+        # The ghost being raced may be the file that gets replaced
+        self.close_ghost()
+        path = ghost_path(self.map_id)
+        score = self.current_score()
+        if score > best_score(path):
+            recorder.save(path, score)
+    
+    def ghost_position(self):
+        """Where the ghost is at the rendered moment, as (x, local y), or None if there is none to show"""
+        if not (self.ghost and self.show_ghost):
+            return None
+        position = self.ghost.position(self.replay_writer.frame - 1 + self.render_alpha, self.width)
+        if position is None:
+            return None
+        return position[0], position[1] - self.current_map.origin_y
+    
+    def toggle_auto_jump(self):
+        """Toggle the player's auto-jump and show a message about it"""
+        enabled = self.player.toggle_auto_jump()
+        self.show_auto_jump_message = True
+        self.auto_jump_message_time = self.sim_clock.get_ticks()
+        self.auto_jump_status = enabled
+    
+    def finish_replay(self):
+        """Stop recording the current run and keep its encoded replay in last_replay"""
+        if self.replay_writer and not self.replay_writer.closed:
+            self.replay_writer.close()
+            self.last_replay = self.replay_writer.stream.getvalue()
+        return self.last_replay
+    
+    def save_replay(self, path):
+        """Write the replay of the last finished run to a file"""
+        with open(path, "wb") as f:
+            f.write(self.last_replay)
+    
+    def start_replay(self, replay):
+        """
+        Start playing back a replay from its first step
+        
+        Args:
+            replay (Replay): Decoded replay to play
+        """
+        self.init_game(custom_settings=replay.settings, seed=replay.seed, level_path=replay.level_path)
+        self.replay_player = ReplayPlayer(replay)
+        self.input_provider = self.replay_player
+        self.state_manager.change_state(GameState.PLAYING)
+    
+    def fast_forward(self, frames, analytic=False):
+        """
+        Run up to `frames` simulation steps at once, without rendering
+        
+        Args:
+            frames (int): Maximum number of steps
+            analytic (bool): Jump over the ball's free flights in one go (see skip_flight)
+                instead of stepping every frame; the result is the same
+        """
+        frame = 0
+        while frame < frames and self.state_manager.is_state(GameState.PLAYING):
+            if analytic:
+                skipped = self.skip_flight(frames - frame)
+                if skipped:
+                    frame += skipped
+                    continue
+            self.update()
+            frame += 1
+        return frame
+    
+    def skip_flight(self, max_steps):
+        """
+        Skip up to `max_steps` steps of the ball's free flight analytically
+        
+        Stops on the step before the next contact or other event, which the
+        regular update then handles. Only possible when the upcoming input is
+        known: no input in headless runs, or an input provider with peek()/skip()
+        such as a replay
+        
+        Returns:
+            int: Steps skipped (0 if the next step has to be simulated normally)
+        """
+        provider = self.input_provider
+        if provider is None:
+            if not self.headless:
+                return 0 # Live keyboard input can change on any step
+            bits, steps = 0, None
+        elif hasattr(provider, "peek"):
+            bits, steps = provider.peek()
+        else:
+            return 0
+        if self.pending_auto_jump_toggle or bits & INPUT_TOGGLE_AUTO_JUMP:
+            return 0
+        if self.ghost_recorder:
+            return 0 # Ghosts sample the ball every few steps
+        if self.map_id and self.start_snapshot is None:
+            return 0 # The first step is stepped normally so the start snapshot is taken
+        if bits & INPUT_SHOOT or len(self.projectiles):
+            return 0 # Shots are fired and moved step by step
+        if steps is not None:
+            max_steps = min(max_steps, steps)
+        
+        skipped, flight, camera = plan_skip(self, bits, max_steps)
+        if skipped:
+            apply_skip(self, flight, camera, skipped)
+            if provider is not None:
+                provider.skip(skipped)
+            self.replay_writer.record(bits, skipped)
+        return skipped
+    
+    def seek_replay(self, frame):
+        """
+        Jump the replay being played to a step
+        
+        Goes back to the snapshot of the last keyframe before the step (playback
+        keeps one for every keyframe it passes), or restarts the run if there is
+        none yet; the simulation then fast-forwards the rest of the way
+        
+        Args:
+            frame (int): Step to continue playing from
+        """
+        player = self.replay_player
+        behind = frame < player.frame or self.input_provider is not player
+        keyframe = max((step for step in self.replay_snapshots if step <= frame), default=None)
+        if keyframe is not None and (behind or keyframe > player.frame):
+            self.restore(self.replay_snapshots[keyframe])
+            player.seek(keyframe)
+            self.input_provider = player
+        elif behind:
+            self.start_replay(player.replay)
+            player = self.replay_player
+        self.fast_forward(frame - player.frame, analytic=True)
+    
+    def read_input(self):
+        """Return the key state for this frame"""
+        if self.input_provider:
+            return self.input_provider(self)
+        if self.headless:
+            return NO_KEYS
+        return pygame.key.get_pressed()
     
     def toggle_debug(self):
         """Toggle debug visualization"""
@@ -248,6 +534,10 @@ class Game:
         """Draw everything to the screen using the renderer"""
         self.renderer.render(self)
     
+    def get_render_camera_y(self):
+        """Camera position interpolated between the last two simulation steps"""
+        return self.prev_camera_y + (self.camera_y - self.prev_camera_y) * self.render_alpha
+    
     def apply_audio_settings(self):
         """Apply current audio settings"""
         # Get the latest settings from the config file
@@ -292,15 +582,59 @@ class Game:
             # Process input
             self.handle_events()
             
-            # Update game state
-            self.update()
+            # Menus leave most of the frame idle: build the next run in it
+            if not self.state_manager.is_state(GameState.PLAYING):
+                self.prepare_next_run()
+            
+            # Run as many fixed steps as the elapsed real time covers
+            while self.accumulator >= self.step_ms:
+                self.update()
+                self.accumulator -= self.step_ms
+            
+            # Blend between the last two steps so motion is smooth at any render rate
+            if self.state_manager.is_state(GameState.PLAYING):
+                self.render_alpha = self.accumulator / self.step_ms
+            else:
+                self.render_alpha = 1.0
             
             # Render new frame
             self.render()
             
-            # Control the game speed
-            self.clock.tick(self.fps)
+            # Control the render rate and bank the elapsed time for the simulation
+            frame_ms = self.clock.tick(self.fps)
+            self.accumulator += min(frame_ms, MAX_FRAME_MS)
         
         # Clean up
         pygame.quit()
-        sys.exit()
\ No newline at end of file
+        sys.exit()
+    
+    def run_headless(self, frames, custom_settings=None, seed=None, level_path=None, analytic=False):
+        """
+        Simulate a game without a window, as fast as the CPU allows
+        
+        Args:
+            frames (int): Maximum number of simulation steps to run
+            custom_settings (dict, optional): Map settings passed to init_game
+            seed (int, optional): World seed passed to init_game
+            level_path (str, optional): Level file passed to init_game
+            analytic (bool): Skip over free flights analytically (see fast_forward)
+            
+        Returns:
+            dict: Frames simulated, final score, game over reason (None if still playing) and world seed
+        """
+        self.init_game(custom_settings=custom_settings, seed=seed, level_path=level_path)
+        self.state_manager.change_state(GameState.PLAYING)
+        
+        frame = self.fast_forward(frames, analytic=analytic)
+        self.finish_replay()
+        
+        reason = None
+        if self.state_manager.is_state(GameState.GAME_OVER):
+            reason = self.state_manager.get_state_data("reason")
+        
+        return {
+            "frames": frame,
+            "score": self.current_score(),
+            "reason": reason,
+            "seed": self.current_map.seed
+        }
\ No newline at end of file
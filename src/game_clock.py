@@ -0,0 +1,63 @@
+"""
+Game clock module for Jumping Ball Game.
+Provides the time source used by the simulation so it can run against the
+wall clock in a window, or against a virtual clock in headless runs.
+"""
+
+import pygame
+
+
+class RealClock:
+    """Clock backed by pygame's wall-clock timer."""
+
+    def __init__(self):
+        self._clock = pygame.time.Clock()
+
+    def tick(self, fps=0):
+        """Wait for the next frame and return the milliseconds since the last tick."""
+        return self._clock.tick(fps)
+
+    def get_ticks(self):
+        """Return the milliseconds since pygame was initialized."""
+        return pygame.time.get_ticks()
+
+
+class VirtualClock:
+    """Clock that only advances when told to, independent of real time."""
+
+    def __init__(self, start_ms=0):
+        self.time_ms = start_ms
+
+    def tick(self, fps=0):
+        """Advance by one frame at the given rate without sleeping."""
+        elapsed = 1000.0 / fps if fps else 0
+        self.advance(elapsed)
+        return elapsed
+
+    def advance(self, ms):
+        """Move the clock forward by the given number of milliseconds."""
+        self.time_ms += ms
+
+    def get_ticks(self):
+        """Return the virtual time in whole milliseconds."""
+        return int(self.time_ms)
+
+
+# The clock gameplay code reads time from (set by the Game on startup)
+_active_clock = None
+
+def set_clock(clock):
+    """Install the clock that get_ticks() reads from."""
+    global _active_clock
+    _active_clock = clock
+
+def get_clock():
+    """Return the active clock, falling back to the wall clock."""
+    global _active_clock
+    if _active_clock is None:
+        _active_clock = RealClock()
+    return _active_clock
+
+def get_ticks():
+    """Return the current time in milliseconds from the active clock."""
+    return get_clock().get_ticks()
@@ -0,0 +1,156 @@
+"""
+Ghost runs for Jumping Ball Game.
+The best run on each official map is kept as a ghost: the ball's position
+every GHOST_TICK steps, quantized to 1/GHOST_SCALE px and packed into
+fixed-size records after a small header (6 bytes per sample, about 1.5 bytes
+per step). While a new run is played the ghost file is read back one block of
+records at a time as the run reaches them, so only a few KB of it are ever
+in memory however long the stored run was.
+
+Ghost y is the world Y (origin + local y, see Map.rebase), so a ghost stays
+in place when the origin moves.
+"""
+
+import os
+import struct
+from array import array
+import numpy as np
+from src.utils.path_utils import data_path
+
+MAGIC = b"JGST"
+VERSION = 1
+
+# magic, version, steps per sample, score, number of samples
+HEADER = struct.Struct("<4sBxxxIII")
+
+# One sample: x and world Y, both in 1/GHOST_SCALE px
+RECORD = np.dtype([("x", "<u2"), ("y", "<i4")])
+
+# A sample is kept every GHOST_TICK steps, at 1/GHOST_SCALE px precision
+GHOST_TICK = 4
+GHOST_SCALE = 4
+
+# Samples read from the file at a time while a ghost plays
+BLOCK_SAMPLES = 256
+
+# Ghosts are kept with the game, wherever it is launched from
+GHOST_DIR = data_path("ghosts")
+
+def ghost_path(map_id, ghost_dir=GHOST_DIR):
+    """File holding the ghost of a map"""
+    return os.path.join(ghost_dir, f"{map_id}.jghost")
+
+def _read_header(f):
+    """Parse a ghost header; returns (tick, score, samples) or None if it isn't a ghost file"""
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        return None
+    magic, version, tick, score, samples = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or tick < 1:
+        return None
+    return tick, score, samples
+
+def best_score(path):
+    """Score of the ghost stored at `path`, or -1 if there is none"""
+    try:
+        with open(path, "rb") as f:
+            header = _read_header(f)
+    except OSError:
+        return -1
+    return header[1] if header else -1
+
+class GhostRecorder:
+    """Samples the ball's position during a run"""
+
+    def __init__(self, tick=GHOST_TICK):
+        self.tick = tick
+        self.x = array("H")
+        self.y = array("i")
+
+    def record(self, frame, x, world_y):
+        """Record the ball's position after step `frame` (kept every `tick` steps)"""
+        if frame % self.tick == 0:
+            self.x.append(min(0xFFFF, max(0, round(x * GHOST_SCALE))))
+            self.y.append(round(world_y * GHOST_SCALE))
+
+    def save(self, path, score):
+        """Write the run as a ghost file, replacing any earlier one in one step"""
+        records = np.empty(len(self.x), dtype=RECORD)
+        records["x"] = self.x
+        records["y"] = self.y
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.tick, score, len(records)))
+            f.write(records.tobytes())
+        os.replace(temp_path, path)
+
+class GhostPlayer:
+    """Plays a stored ghost back, streaming its samples from the file"""
+
+    def __init__(self, f, tick, score, samples):
+        self.file = f
+        self.tick = tick
+        self.score = score
+        self.samples = samples
+        self.block_start = 0
+        self.block = np.empty(0, dtype=RECORD)
+
+    @classmethod
+    def open(cls, path):
+        """Open the ghost at `path`; None if there is no valid ghost there"""
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        header = _read_header(f)
+        if header is None or header[2] == 0:
+            f.close()
+            return None
+        return cls(f, *header)
+
+    def close(self):
+        """Close the ghost file"""
+        self.file.close()
+
+    def _load(self, index, last):
+        """Make sure the block in memory holds samples `index` to `last`, reading from `index` if not"""
+        if self.block_start <= index and last < self.block_start + len(self.block):
+            return
+        self.file.seek(HEADER.size + index * RECORD.itemsize)
+        count = min(BLOCK_SAMPLES, self.samples - index)
+        self.block = np.frombuffer(self.file.read(count * RECORD.itemsize), dtype=RECORD)
+        self.block_start = index
+
+    def _sample(self, index):
+        """One sample of the block in memory as (x, world y) in px"""
+        record = self.block[index - self.block_start]
+        return record["x"].item() / GHOST_SCALE, record["y"].item() / GHOST_SCALE
+
+    def position(self, frame, wrap_width):
+        """
+        Where the ghost was `frame` steps into its run
+
+        Args:
+            frame (float): Steps since the start; fractions blend between samples
+            wrap_width (float): World width, so a wrap around the edges isn't blended across
+
+        Returns:
+            tuple: (x, world y), or None once the ghost's run has ended
+        """
+        step = frame / self.tick
+        index = int(step)
+        if index < 0 or index >= self.samples:
+            return None
+        last = min(index + 1, self.samples - 1)
+        self._load(index, last)
+        if last - self.block_start >= len(self.block):
+            return None # The file ends early
+        x0, y0 = self._sample(index)
+        if last == index:
+            return x0, y0
+        x1, y1 = self._sample(index + 1)
+        t = step - index
+        if abs(x1 - x0) > wrap_width / 2:
+            return (x0 if t < 0.5 else x1), y0 + (y1 - y0) * t
+        return x0 + (x1 - x0) * t, y0 + (y1 - y0) * t
@@ -0,0 +1,163 @@
+"""
+Level files for Jumping Ball Game.
+A .jlvl file stores a complete platform layout as fixed-width binary records:
+
+    header        HEADER_DTYPE, one record
+    height index  INDEX_DTYPE, one record per chunk (bottom to top)
+    platforms     RECORD_DTYPE, grouped by chunk in index order
+
+The file is memory-mapped and wrapped in NumPy views without copying, so
+opening even a very tall level is instant; a chunk's records are only read
+(and turned into Python values) when the map loads that chunk. LevelFile has
+the same chunk interface as WorldGenerator and can be used in its place.
+"""
+
+import mmap
+import os
+import numpy as np
+from src.world_generator import Chunk
+
+MAGIC = b"JLVL"
+VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("reserved", "<u2"),
+    ("seed", "<u4"), # Seed the layout was generated from (0 if hand-authored)
+    ("chunk_count", "<u4"),
+    ("record_count", "<u4"),
+    ("starter_top", "<f4"), # World Y of the top of chunk 0
+    ("starter_bottom", "<f4"), # World Y of the bottom of chunk 0
+    ("chunk_height", "<f4"), # Height of every chunk above chunk 0
+])
+
+INDEX_DTYPE = np.dtype([
+    ("first", "<u4"), # First platform record of the chunk
+    ("count", "<u4"), # Number of platform records in the chunk
+    ("top", "<f4"),
+    ("bottom", "<f4"),
+])
+
+RECORD_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("direction", "i1"),
+    ("reserved", "<u2"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("width", "<f4"),
+])
+
+class LevelFileError(Exception):
+    """Raised when a file is not a valid level file"""
+    pass
+
+def write_level(path, chunks, seed=0):
+    """
+    Write chunks to a level file
+
+    Args:
+        path (str): Output file path
+        chunks (list): Chunk objects, starting with chunk 0 and in index order
+        seed (int): Seed the chunks were generated from
+    """
+    index = np.zeros(len(chunks), dtype=INDEX_DTYPE)
+    records = np.zeros(sum(len(chunk.platforms) for chunk in chunks), dtype=RECORD_DTYPE)
+    first = 0
+    for i, chunk in enumerate(chunks):
+        count = len(chunk.platforms)
+        index[i] = (first, count, chunk.top, chunk.bottom)
+        for j, (kind, x, y, width, direction) in enumerate(chunk.platforms):
+            records[first + j] = (kind, direction, 0, x, y, width)
+        first += count
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    chunk_height = chunks[1].bottom - chunks[1].top if len(chunks) > 1 else chunks[0].bottom - chunks[0].top
+    header[0] = (MAGIC, VERSION, 0, seed, len(chunks), len(records),
+                 chunks[0].top, chunks[0].bottom, chunk_height)
+
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(index.tobytes())
+        f.write(records.tobytes())
+
+class LevelFile:
+    """A memory-mapped level file, read one chunk at a time"""
+
+    def __init__(self, path):
+        """Open and map a level file; no platform records are read yet"""
+        self.path = path
+        with open(path, "rb") as f:
+            # Checked before mapping: an empty file can't be mapped at all
+            if os.fstat(f.fileno()).st_size < HEADER_DTYPE.itemsize:
+                raise LevelFileError(f"{path}: file too short for a level header")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = np.frombuffer(self._mmap, dtype=HEADER_DTYPE, count=1)[0]
+        if self.header["magic"] != MAGIC:
+            raise LevelFileError(f"{path}: not a level file")
+        if self.header["version"] != VERSION:
+            raise LevelFileError(f"{path}: unsupported level version {self.header['version']}")
+
+        chunk_count = int(self.header["chunk_count"])
+        record_count = int(self.header["record_count"])
+        index_offset = HEADER_DTYPE.itemsize
+        records_offset = index_offset + chunk_count * INDEX_DTYPE.itemsize
+        if len(self._mmap) < records_offset + record_count * RECORD_DTYPE.itemsize:
+            raise LevelFileError(f"{path}: file is truncated")
+
+        # Views onto the mapped file; pages are only read when accessed
+        self.index = np.frombuffer(self._mmap, dtype=INDEX_DTYPE, count=chunk_count, offset=index_offset)
+        self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=record_count, offset=records_offset)
+
+        self.seed = int(self.header["seed"])
+        self.chunk_count = chunk_count
+        self.starter_top = float(self.header["starter_top"])
+        self.chunk_height = float(self.header["chunk_height"])
+
+    def close(self):
+        """Unmap the file"""
+        # The views must go before the map can be closed
+        self.header = self.index = self.records = None
+        self._mmap.close()
+
+    def chunk_top(self, index):
+        """World Y of the top edge of a chunk (chunks past the end of the level are empty)"""
+        if index <= 0:
+            return self.starter_top
+        if index < self.chunk_count:
+            return float(self.index["top"][index])
+        return self.chunk_top(self.chunk_count - 1) - (index - self.chunk_count + 1) * self.chunk_height
+
+    def chunk_bottom(self, index):
+        """World Y of the bottom edge of a chunk"""
+        if index < self.chunk_count:
+            return float(self.index["bottom"][max(0, index)])
+        return self.chunk_top(index - 1)
+
+    def chunk_index_at(self, y):
+        """Index of the chunk containing world Y"""
+        if y >= self.starter_top:
+            return 0
+        # Chunk tops decrease with the index, so search the negated tops
+        index = int(np.searchsorted(-self.index["top"], -y, side="left"))
+        if index < self.chunk_count:
+            return index
+        last_top = self.chunk_top(self.chunk_count - 1)
+        return self.chunk_count - 1 - int((y - last_top) // self.chunk_height)
+
+    def generate_chunk(self, index):
+        """Read one chunk's platforms from the file"""
+        platforms = []
+        if 0 <= index < self.chunk_count:
+            first = int(self.index["first"][index])
+            records = self.records[first:first + int(self.index["count"][index])]
+            platforms = list(zip(records["kind"].tolist(), records["x"].tolist(), records["y"].tolist(),
+                                 records["width"].tolist(), records["direction"].tolist()))
+        return Chunk(index, self.chunk_top(index), self.chunk_bottom(index), platforms)
+
+    def platforms_in_range(self, y0, y1):
+        """(kind, x, y, width, direction) tuples of every platform with y0 <= y <= y1"""
+        platforms = []
+        for index in range(self.chunk_index_at(y1), self.chunk_index_at(y0) + 1):
+            platforms.extend(p for p in self.generate_chunk(index).platforms if y0 <= p[2] <= y1)
+        return platforms
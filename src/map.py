@@ -1,236 +1,315 @@
+import time
+from collections import deque
 import pygame
-import random
-from src.platform import Platform, MovingPlatform, DisappearingPlatform, DangerousPlatform
-from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT, PLATFORM_COUNT, WHITE, BLACK, RED, GREEN, BLUE, PLATFORM_COLORS, PLATFORM_WIDTH, PLATFORM_HEIGHT
+import numpy as np
+from src import game_clock
+from src.platform import MOTION, DURABILITY, ARCHETYPES, KIND_NAMES, COLLIDING, STYLE_COLORS, has_component
+from src.platform_store import PlatformStore
+from src.world_generator import world_generator_for, random_seed
+from src.chunk_prefetcher import ChunkPrefetcher
+from src.reachability import BOUNCE_MULTIPLIER
+from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, BLACK, RED, GREEN, BLUE, PLATFORM_COLORS, PLATFORM_HEIGHT
+
+# Extra world height searched above and below the screen when drawing
+DRAW_QUERY_MARGIN = PLATFORM_HEIGHT * 4
+
+# Platforms within this distance above or below the screen are stepped every frame
+ACTIVATION_MARGIN = 200
+
+# Platforms this far below the bottom of the screen are removed
+CULL_MARGIN = 200
+
+# Platforms up to this far above the screen are always in the store
+PLATFORM_GENERATION_BUFFER = 200
+
+# Platforms added ahead of need in one frame, at most, and the time they may take
+PLATFORMS_PER_FRAME = 4
+GENERATION_BUDGET_MS = 0.5
+
+# Chunks above the loaded world that the background worker keeps ready
+PREFETCH_CHUNKS = 2
+
+# The origin is moved up to the camera once the camera is this far above it
+REBASE_DISTANCE = 4096
 
 class Map:
-    def __init__(self, theme_color=(0, 150, 0), gravity=0.5, platform_speed=2, platform_density=2.0, 
-                 moving_platform_pct=25, disappearing_platform_pct=15, dangerous_platform_pct=10, 
-                 platform_count_per_generation=10):
-        self.platforms = []
+    def __init__(self, theme_color=(0, 150, 0), gravity=0.5, platform_speed=2, settings=None,
+                 seed=None, level=None, envelope=None, target_height=-5000, store=None):
+        # Array-backed storage for all platforms (a spare store from an earlier map is reused)
+        self.store = store if store is not None else PlatformStore()
         self.theme_color = theme_color
         self.gravity = gravity
         self.platform_speed = platform_speed
-        self.target_height = -5000  # Negative because we'll be going up
+        self.target_height = target_height  # World Y of the goal (negative because we go up), None for an endless climb
+        self.origin_y = 0 # World Y that local y = 0 stands for; stored platforms use local y (see rebase)
         self.debug_mode = False
         self.game = None  # Reference to game object for sound effects
         
-        # Custom platform generation settings
-        self.platform_density = platform_density  # Higher = more platforms (closer together)
-        self.moving_platform_pct = moving_platform_pct / 100.0  # Convert to decimal
-        self.disappearing_platform_pct = disappearing_platform_pct / 100.0
-        self.dangerous_platform_pct = dangerous_platform_pct / 100.0
-        self.platforms_to_generate = platform_count_per_generation
+        # Custom map settings the world is generated with (see world_generator_for)
+        self.settings = settings
         
-        # Calculate regular platform percentage based on others
-        total_special = self.moving_platform_pct + self.disappearing_platform_pct + self.dangerous_platform_pct
-        self.regular_platform_pct = max(0, 1.0 - total_special)
+        # World seed: the same seed and settings always give the same world
+        self.seed = random_seed() if seed is None else seed
+        self.level = level # LevelFile to load the layout from instead of generating it
+        self.envelope = envelope # Player reach the generator keeps every platform within
+        if level:
+            self.seed = level.seed
+        self.generator = None # Created by generate_map once the screen size is known
+        self.prefetcher = None # Background worker building upcoming chunks
+        self.loaded_chunks = [] # Indices of chunks taken from the generator, bottom to top
+        self.queued = deque() # Platforms of taken chunks not yet in the store, bottom to top
         
+    @property
+    def platforms(self):
+        """List of all live platform objects, with dormant platforms brought up to date"""
+        self.store.sync_all()
+        return [self.store.handle(row) for row in self.store.live_rows().tolist()]
+    
+    def remove_platform(self, platform):
+        """Remove a platform from the map"""
+        self.store.remove(platform.row)
+    
     def set_game(self, game):
         """Set reference to game object for sound effects"""
         self.game = game
         
-        # Set game reference on all existing platforms
-        for platform in self.platforms:
-            if isinstance(platform, MovingPlatform):
-                platform.set_game(game)
-        
     def generate_map(self):
-        """Generate the initial platforms for the map"""
+        """Set up the world generator (or level file) and load the starter chunk"""
         # Clear any existing platforms
-        self.platforms = []
+        self.store.clear()
+        self._stop_prefetcher()
         
-        # Create a starter platform at the bottom
-        start_platform = Platform(self.game.width // 2 - 50, self.game.height - 50, width=PLATFORM_WIDTH, height=PLATFORM_HEIGHT)
-        self.platforms.append(start_platform)
+        if self.level:
+            # A level file has the same chunk interface as the generator
+            self.generator = self.level
+        else:
+            self.generator = world_generator_for(self.settings, self.seed, self.game.width, self.game.height,
+                                                 self.envelope)
+        self.loaded_chunks = []
+        self.queued.clear()
+        self.origin_y = 0
         
-        # Calculate vertical gap based on platform density
-        # Higher density = smaller gap
-        base_gap = 70  # Default gap
-        vertical_gap = int(base_gap / self.platform_density)
-        vertical_gap = max(40, min(100, vertical_gap))  # Constrain between 40-100
+        # Chunk 0 holds the starter platform and the first platforms above the player
+        self.load_chunk(self.generator.generate_chunk(0))
         
-        # Calculate the initial Y position for the first jumpable platform
-        # Start from the player's initial Y and add a gap to place the first platform above
-        # The player's initial Y is self.game.height - 100
-        player_start_y = self.game.height - 100
-        current_y = player_start_y - vertical_gap
+        # Start building the chunks above in the background
+        self.prefetcher = ChunkPrefetcher(self.generator)
+        self.prefetch_chunks()
         
-        for i in range(PLATFORM_COUNT):
-            # Calculate y position with density-adjusted spacing
-            y = current_y
-            
-            # Ensure good horizontal distribution
-            # Divide screen into sections for better distribution
-            section_width = self.game.width // 3
-            section = i % 3  # 0, 1, or 2
-            
-            # Random x within the section to ensure platforms across the screen
-            min_x = section * section_width + 20
-            max_x = (section + 1) * section_width - 120
-            x = random.randint(min_x, max_x)
-            
-            # Create platform with the configured probabilities
-            platform = self._create_platform_by_type(x, y)
-            self.platforms.append(platform)
-            current_y -= vertical_gap # Move upwards for the next platform
+        # Fill the first screen before play starts (the camera starts at 0)
+        self.ensure_platforms(-PLATFORM_GENERATION_BUFFER)
+        
+    def _stop_prefetcher(self):
+        """Stop the background chunk worker"""
+        if self.prefetcher:
+            self.prefetcher.close()
+            self.prefetcher = None
+        
+    def close(self):
+        """Stop the background chunk worker and close the level file, if any"""
+        self._stop_prefetcher()
+        if self.level:
+            self.level.close()
+            self.level = None
+        
+    def chunk_top(self, index):
+        """Local Y of the top edge of a chunk"""
+        return self.generator.chunk_top(index) - self.origin_y
+    
+    def goal_y(self):
+        """Local Y the camera has to reach to win, or None on an endless climb"""
+        return None if self.target_height is None else self.target_height - self.origin_y
+    
+    def rebase(self, shift):
+        """
+        Move the origin to world Y `shift` (relative to the current origin)
+        
+        Everything in local coordinates moves down by `shift`, so y values stay
+        small however far the climb goes. The caller moves the camera and player
+        by the same amount. Chunks and queued platforms keep their world Y and
+        are converted when they are added.
+        """
+        self.origin_y += shift
+        self.store.shift_y(-shift)
+    
+    def prefetch_chunks(self):
+        """Keep the next few chunks above the loaded world queued for the worker"""
+        next_chunk = self.loaded_chunks[-1] + 1
+        for index in range(next_chunk, next_chunk + PREFETCH_CHUNKS):
+            self.prefetcher.request(index)
+        
+    def load_chunk(self, chunk):
+        """Add the platforms of a generated chunk to the store"""
+        for kind, x, y, width, direction in chunk.platforms:
+            self._add_platform(kind, x, y, width, direction)
+        self.loaded_chunks.append(chunk.index)
         
     def update(self, camera_y):
         """Update all platforms, remove off-screen ones, generate new ones"""
-        # Update platforms based on type
-        for platform in self.platforms:
-            platform.update(camera_y)
+        # Step the platforms near the camera at once; the rest stay dormant until
+        # they come back into range. Play a sound if a moving platform turned around
+        if self.store.update(game_clock.get_ticks(), camera_y - ACTIVATION_MARGIN,
+                             camera_y + self.game.height + ACTIVATION_MARGIN):
+            self._play_movement_sound()
             
         # Remove platforms that are below the bottom of the screen with a margin
-        self.platforms = [p for p in self.platforms if p.y < self.game.height - camera_y + 200]
+        cull_y = camera_y + self.game.height + CULL_MARGIN
+        self.store.remove_below(cull_y)
         
-        # Find the highest platform
-        if self.platforms:
-            highest_y = min([p.y for p in self.platforms])
-            # Only generate more platforms if the highest platform is within a buffer above the visible area
-            screen_top = camera_y
-            PLATFORM_GENERATION_BUFFER = 200  # Only generate if close to top
-            if highest_y > screen_top - PLATFORM_GENERATION_BUFFER:
-                self.generate_more_platforms(camera_y)
-    
-    def _create_platform_by_type(self, x, y, width=PLATFORM_WIDTH):
-        """Create a platform based on configured percentages"""
-        # Randomize platform type based on configured percentages
-        platform_type = random.choices(
-            ["regular", "moving", "disappearing", "dangerous"],
-            weights=[
-                self.regular_platform_pct, 
-                self.moving_platform_pct,
-                self.disappearing_platform_pct,
-                self.dangerous_platform_pct
-            ],
-            k=1
-        )[0]
+        # Forget chunks that are entirely below the cull line
+        while len(self.loaded_chunks) > 1 and self.chunk_top(self.loaded_chunks[0]) >= cull_y:
+            self.loaded_chunks.pop(0)
         
-        # Create the appropriate platform type
-        if platform_type == "regular":
-            return Platform(x, y, width=width, height=PLATFORM_HEIGHT)
-        elif platform_type == "moving":
-            platform = MovingPlatform(x, y, width=width, height=PLATFORM_HEIGHT, speed=self.platform_speed)
-            if self.game:
-                platform.set_game(self.game)
-            return platform
-        elif platform_type == "disappearing":
-            return DisappearingPlatform(x, y, width=width, height=PLATFORM_HEIGHT)
-        elif platform_type == "dangerous":
-            return DangerousPlatform(x, y, width=width, height=PLATFORM_HEIGHT)
+        # Only generate more platforms if the loaded world ends within a buffer above the visible area
+        self.generate_more_platforms(camera_y)
+    
+    def _play_movement_sound(self):
+        """Play sound when a moving platform changes direction"""
+        if self.game and hasattr(self.game, 'sound_manager'):
+            self.game.sound_manager.play_game_sound("platform_move")
+    
+    def _add_platform(self, kind, x, y, width, direction=1):
+        """Add a platform of the given kind at world Y `y` to the store"""
+        y -= self.origin_y
+        archetype = ARCHETYPES[kind]
+        # Moving platforms start at frame 0 wherever they are added, so when a
+        # platform is spliced in never changes where it is
+        speed = self.platform_speed if archetype.components & MOTION else 0.0
+        return self.store.add(kind, x, y, width, PLATFORM_HEIGHT, speed=speed, direction=direction,
+                              jumps=archetype.durability, step_frame=0)
     
     def generate_more_platforms(self, camera_y):
-        """Generate additional platforms as the player moves up"""
-        # Find the highest platform
-        highest_y = min([p.y for p in self.platforms]) if self.platforms else self.game.height
-
-        # Use a fixed vertical gap for consistency
-        vertical_gap = 70  # Or whatever value you prefer
-
-        platform_count = self.platforms_to_generate if hasattr(self, 'platforms_to_generate') else 10
-
-        for i in range(platform_count):
-            # Each new platform is placed above the previous highest
-            y = highest_y - (i + 1) * vertical_gap
-
-            # Alternate between left, center, and right sections
-            section = i % 3
-            if section == 0:
-                x = random.randint(50, self.game.width // 3 - 50)
-            elif section == 1:
-                x = random.randint(self.game.width // 3 + 50, 2 * self.game.width // 3 - 50)
-            else:
-                x = random.randint(2 * self.game.width // 3 + 50, self.game.width - 150)
-
-            # Randomize platform type with weights
-            platform_type = random.choices(
-                ["regular", "moving", "disappearing", "dangerous"],
-                weights=[0.7, 0.15, 0.1, 0.05],  # More regular platforms
-                k=1
-            )[0]
-
-            platform_width = random.randint(80, 120)
-
-            # Create the appropriate platform type
-            if platform_type == "regular":
-                platform = Platform(x, y, width=platform_width, height=PLATFORM_HEIGHT)
-            elif platform_type == "moving":
-                platform = MovingPlatform(x, y, width=platform_width, height=PLATFORM_HEIGHT, speed=self.platform_speed)
-            elif platform_type == "disappearing":
-                platform = DisappearingPlatform(x, y, width=platform_width, height=PLATFORM_HEIGHT)
-            elif platform_type == "dangerous":
-                platform = DangerousPlatform(x, y, width=platform_width, height=PLATFORM_HEIGHT)
-
-            # Overlap check
-            overlapping = False
-            for existing_platform in self.platforms:
-                if (abs(existing_platform.y - y) < PLATFORM_HEIGHT * 2 and
-                    abs(existing_platform.x - x) < platform_width):
-                    overlapping = True
-                    break
-
-            if not overlapping:
-                self.platforms.append(platform)
+        """
+        Keep the world built ahead of the camera, a few platforms per frame
+        
+        Chunks are taken as far ahead as the camera may travel before the ball
+        next peaks (predicted from its velocity), and their platforms are spliced
+        in a few at a time within a time budget. Platforms the screen is about to
+        show are always added at once, so the world never runs dry
+        """
+        required_y = camera_y - PLATFORM_GENERATION_BUFFER
+        self.queue_chunks(required_y - self.predicted_rise())
+        self.ensure_platforms(required_y)
+        
+        # Add the rest ahead of need, spread over frames
+        deadline = time.perf_counter() + GENERATION_BUDGET_MS / 1000
+        added = 0
+        while self.queued and added < PLATFORMS_PER_FRAME and time.perf_counter() < deadline:
+            self._add_platform(*self.queued.popleft())
+            added += 1
+    
+    def predicted_rise(self):
+        """How far the ball can still climb before it peaks, now or after its next bounce"""
+        player = self.game.player if self.game else None
+        if player is None or player.gravity <= 0:
+            return 0
+        speed = max(-player.vel_y, player.jump_strength * BOUNCE_MULTIPLIER)
+        if speed <= 0:
+            return 0
+        return speed * speed / (2 * player.gravity)
+    
+    def queue_chunks(self, y):
+        """Take chunks from the generator until the taken world reaches local Y `y`"""
+        taken = False
+        while self.chunk_top(self.loaded_chunks[-1]) > y:
+            # Usually already built by the worker, so this only queues its platforms
+            chunk = self.prefetcher.take(self.loaded_chunks[-1] + 1)
+            self.queued.extend(chunk.platforms)
+            self.loaded_chunks.append(chunk.index)
+            taken = True
+        if taken:
+            self.prefetch_chunks()
+    
+    def ensure_platforms(self, y):
+        """Add every platform at or below local Y `y` to the store now, whatever it costs"""
+        self.queue_chunks(y)
+        while self.queued and self.queued[0][2] - self.origin_y >= y:
+            self._add_platform(*self.queued.popleft())
             
-    def draw(self, screen, camera_y):
-        """Draw the map"""
-        # Draw platforms
-        for platform in self.platforms:
-            # Calculate screen position - THIS IS KEY:
-            # Platform.y is in world coordinates, we need to convert to screen coordinates
-            # by subtracting the camera position
-            screen_y = platform.y - camera_y
+    def draw(self, screen, camera_y, alpha=1.0):
+        """Draw the map
+        
+        Args:
+            alpha (float): Interpolation factor between the previous and current step
+        """
+        store = self.store
+        
+        # Only look at platforms near the camera (the exact visibility test is below)
+        rows = store.rows_in_range(camera_y - DRAW_QUERY_MARGIN,
+                                   camera_y + screen.get_height() + DRAW_QUERY_MARGIN)
+        store.sync(rows)
+        
+        # Calculate screen positions - THIS IS KEY:
+        # Platform y is in world coordinates, we need to convert to screen coordinates
+        # by subtracting the camera position
+        screen_y = store.y[rows] - camera_y
+        height = store.height[rows]
+        
+        # Only draw platforms that are visible on screen
+        # Add more margin so platforms appear earlier when scrolling upward
+        visible = (screen_y > -height * 4) & (screen_y < screen.get_height() + height * 2)
+        rows = rows[visible]
+        
+        # Blend moving platforms between steps
+        prev_x = store.prev_x[rows]
+        draw_x = prev_x + (store.x[rows] - prev_x) * alpha
+        
+        # Colors come from each row's render style, worked out for all rows at once
+        styles = store.render_styles(rows)
+        
+        rects = []
+        for x, y, width, h, style, flags, platform_id in zip(
+                draw_x.tolist(), screen_y[visible].tolist(), store.width[rows].tolist(),
+                height[visible].tolist(), styles.tolist(), store.flags[rows].tolist(), store.ids[rows].tolist()):
+            # Create rectangle for drawing
+            rect = pygame.Rect(x, y, width, h)
+            rects.append(rect)
             
-            # Only draw platforms that are visible on screen
-            # Add more margin so platforms appear earlier when scrolling upward
-            if screen_y > -platform.height * 4 and screen_y < screen.get_height() + platform.height * 2:
-                # Create rectangle for drawing
-                rect = pygame.Rect(platform.x, screen_y, platform.width, platform.height)
-                
-                # Choose platform color
-                color = platform.color
-                
-                # Draw the platform
-                pygame.draw.rect(screen, color, rect)
-                
-                # Draw border around platform (helps see exact collision area)
-                border_color = BLACK
-                if platform.colliding and self.debug_mode:
-                    border_color = RED  # Red border for colliding platforms in debug mode
-                    # Draw a highlight effect for better visibility
-                    highlight_rect = rect.inflate(4, 4)
-                    pygame.draw.rect(screen, (255, 255, 255), highlight_rect, 1)
-                pygame.draw.rect(screen, border_color, rect, 2)
-                
-                # For disappearing platforms, show jumps remaining
-                if isinstance(platform, DisappearingPlatform) and platform.jumps_remaining > 0:
-                    font = pygame.font.SysFont(None, 18)
-                    text = font.render(str(platform.jumps_remaining), True, BLACK)
-                    screen.blit(text, (rect.centerx - text.get_width()//2, 
-                                      rect.centery - text.get_height()//2))
-                
-                # In debug mode, show platform id and position
-                if self.debug_mode:
-                    font = pygame.font.SysFont(None, 18)
-                    # Show world and screen coordinates
-                    text = font.render(f"ID:{platform.id}", True, BLACK)
-                    screen.blit(text, (platform.x + 5, screen_y + 5))
+            # Draw the platform
+            pygame.draw.rect(screen, STYLE_COLORS[style], rect)
+            
+            # Draw border around platform (helps see exact collision area)
+            border_color = BLACK
+            if flags & COLLIDING and self.debug_mode:
+                border_color = RED  # Red border for colliding platforms in debug mode
+                # Draw a highlight effect for better visibility
+                highlight_rect = rect.inflate(4, 4)
+                pygame.draw.rect(screen, (255, 255, 255), highlight_rect, 1)
+            pygame.draw.rect(screen, border_color, rect, 2)
+            
+            # In debug mode, show platform id and position
+            if self.debug_mode:
+                font = pygame.font.SysFont(None, 18)
+                # Show world and screen coordinates
+                text = font.render(f"ID:{platform_id}", True, BLACK)
+                screen.blit(text, (x + 5, y + 5))
+        
+        # Platforms that wear out show how many landings they have left
+        jumps = store.jumps_remaining[rows]
+        labelled = np.flatnonzero(has_component(store.kind[rows], DURABILITY) & (jumps > 0))
+        if labelled.size:
+            font = pygame.font.SysFont(None, 18)
+            for i, remaining in zip(labelled.tolist(), jumps[labelled].tolist()):
+                rect = rects[i]
+                text = font.render(str(remaining), True, BLACK)
+                screen.blit(text, (rect.centerx - text.get_width()//2, 
+                                  rect.centery - text.get_height()//2))
     
     def draw_platform_info(self, screen, camera_y):
         """Draw detailed platform info in debug mode"""
         font = pygame.font.SysFont(None, 14)
         y_pos = 250  # Starting y position
+        rows = self.store.live_rows()
         
         # Draw total platform count
         count_font = pygame.font.SysFont(None, 18)
-        count_text = count_font.render(f"Total Platforms: {len(self.platforms)}", True, BLACK)
+        count_text = count_font.render(f"Total Platforms: {rows.size}", True, BLACK)
         screen.blit(count_text, (10, 240))
         
         # Find the highest and lowest platforms
-        if self.platforms:
-            highest_y = min([p.y for p in self.platforms])
-            lowest_y = max([p.y for p in self.platforms])
+        if rows.size:
+            highest_y = self.store.index.min_y()
+            lowest_y = self.store.index.max_y()
             
             highest_text = count_font.render(f"Highest: {highest_y:.0f} (screen: {highest_y - camera_y:.0f})", True, BLACK)
             lowest_text = count_font.render(f"Lowest: {lowest_y:.0f} (screen: {lowest_y - camera_y:.0f})", True, BLACK)
@@ -238,28 +317,24 @@ class Map:
             screen.blit(highest_text, (10, 260))
             screen.blit(lowest_text, (10, 280))
             
-            # Also show platform distribution
-            platform_types = {
-                "regular": 0,
-                "moving": 0,
-                "disappearing": 0,
-                "dangerous": 0
-            }
+            chunk_text = count_font.render(f"Seed: {self.seed}  Origin: {self.origin_y}  Chunks: {self.loaded_chunks[0]}-{self.loaded_chunks[-1]} ({self.prefetcher.sync_generated} not prefetched, {len(self.queued)} platforms queued)", True, BLACK)
+            screen.blit(chunk_text, (10, 300))
+            
+            # Platforms the generator had to move, or could not make reachable
+            repaired = getattr(self.generator, "repaired_platforms", 0)
+            unreachable = getattr(self.generator, "unreachable_platforms", 0)
+            reach_text = count_font.render(f"Reach repairs: {repaired}  Unreachable: {unreachable}", True, BLACK)
+            screen.blit(reach_text, (10, 320))
             
-            for platform in self.platforms:
-                if isinstance(platform, MovingPlatform):
-                    platform_types["moving"] += 1
-                elif isinstance(platform, DisappearingPlatform):
-                    platform_types["disappearing"] += 1
-                elif isinstance(platform, DangerousPlatform):
-                    platform_types["dangerous"] += 1
-                else:
-                    platform_types["regular"] += 1
+            # Also show platform distribution
+            counts = np.bincount(self.store.kind[rows], minlength=len(KIND_NAMES))
             
-            # Display counts
-            dist_y = 300
-            for p_type, count in platform_types.items():
-                dist_text = count_font.render(f"{p_type.capitalize()}: {count}", True, BLACK)
+            # Display counts, with how often each kind's object pool was reused
+            dist_y = 340
+            pool_stats = self.store.pool_stats()
+            for p_type, count in zip(KIND_NAMES, counts.tolist()):
+                pool = pool_stats[p_type]
+                dist_text = count_font.render(f"{p_type.capitalize()}: {count} (pool {pool['hits']}/{pool['misses']} hit/miss)", True, BLACK)
                 screen.blit(dist_text, (10, dist_y))
                 dist_y += 20
     
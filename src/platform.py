@@ -1,128 +1,148 @@
-import pygame
-import random
-from src.constants import WHITE, BLACK, RED, GREEN, BLUE, YELLOW, SCREEN_WIDTH, PLATFORM_WIDTH, PLATFORM_HEIGHT
+import numpy as np
+from src import game_clock
+from src.constants import WHITE, BLACK, RED, GREEN, BLUE, YELLOW, PLATFORM_WIDTH, PLATFORM_HEIGHT
+
+# Platform kinds, stored in the PlatformStore 'kind' column
+REGULAR = 0
+MOVING = 1
+DISAPPEARING = 2
+DANGEROUS = 3
+
+# Bits of the PlatformStore 'flags' column
+ALIVE = 1
+COLLIDING = 2
+BOUNCE_READY = 4
+
+# Components a platform kind can be made of, as bits of its archetype
+MOTION = 1 # Slides sideways (speed and direction columns), turning round at the screen edges
+HAZARD = 2 # Ends the run when landed on
+DURABILITY = 4 # Is removed once landed on jumps_remaining times
+COOLDOWN = 8 # Doesn't bounce the ball again until a short cooldown has passed
+
+DISAPPEARING_COLOR = (255, 200, 0) # Orange
+DISAPPEARING_LAST_JUMP_COLOR = (200, 150, 0) # Darker orange/yellow for one jump left
+
+class Archetype:
+    """What a platform kind is made of: its components, how it's drawn and its starting durability"""
+    __slots__ = ("name", "components", "color", "worn_color", "durability")
+
+    def __init__(self, name, components, color, worn_color=None, durability=0):
+        self.name = name
+        self.components = components
+        self.color = color
+        self.worn_color = worn_color or color # Color with one landing left (DURABILITY kinds)
+        self.durability = durability # Landings a new platform takes (DURABILITY kinds)
+
+# Archetype of each kind, indexed by the kind value. A new kind is a new entry
+# here (plus its handle class below): the systems in PlatformStore, Map.draw
+# and the collision code look kinds up in these tables instead of branching on them
+ARCHETYPES = (
+    Archetype("regular", COOLDOWN, GREEN),
+    Archetype("moving", MOTION | COOLDOWN, BLUE),
+    Archetype("disappearing", DURABILITY, DISAPPEARING_COLOR, worn_color=DISAPPEARING_LAST_JUMP_COLOR, durability=1),
+    Archetype("dangerous", HAZARD | COOLDOWN, RED),
+)
+
+KIND_NAMES = tuple(archetype.name for archetype in ARCHETYPES)
+KIND_COLORS = tuple(archetype.color for archetype in ARCHETYPES)
+
+# Component bits by kind, to look up a whole column of kinds at once
+KIND_COMPONENTS = np.array([archetype.components for archetype in ARCHETYPES], dtype=np.uint8)
+
+# Colors by render style: style k is kind k, style len(ARCHETYPES) + k is kind k worn down
+STYLE_COLORS = KIND_COLORS + tuple(archetype.worn_color for archetype in ARCHETYPES)
+
+def has_component(kinds, component):
+    """Mask of which of `kinds` (a kind or an array of kinds) have `component`"""
+    return (KIND_COMPONENTS[kinds] & component) != 0
+
+def _column(name):
+    """Property reading and writing one column of the platform's store row"""
+    def getter(self):
+        return getattr(self.store, name)[self.row].item()
+    def setter(self, value):
+        getattr(self.store, name)[self.row] = value
+    return property(getter, setter)
+
+def _flag(bit):
+    """Property reading and writing one bit of the platform's store flags"""
+    def getter(self):
+        return bool(self.store.flags[self.row] & bit)
+    def setter(self, value):
+        if value:
+            self.store.flags[self.row] |= bit
+        else:
+            self.store.flags[self.row] &= ~bit & 0xFF
+    return property(getter, setter)
 
 class Platform:
-    """Base platform class"""
-    id_counter = 0
-    
-    def __init__(self, x, y, width, height, color=None):
-        """Initialize platform"""
-        Platform.id_counter += 1
-        self.id = Platform.id_counter
-        self.x = x
-        self.y = y # World Y coordinate
-        self.width = width
-        self.height = height
-        self.color = color or GREEN
-        self.colliding = False
-        self.collision_timer = 0
-        self.bounce_ready = True
-        self.last_collision_time = 0  # Track when last collision occurred
-        
-    def update(self, camera_y):
-        """Update platform"""
-        if self.colliding:
-            self.collision_timer += 1
-            if self.collision_timer > 5:
-                self.colliding = False
-                self.collision_timer = 0
-        
-        # Reset bounce_ready flag after a short cooldown, even if player is still on platform
-        # This allows bouncing on the same platform multiple times
-        if not self.bounce_ready and pygame.time.get_ticks() - self.last_collision_time > 300:  # 300ms cooldown
-            self.bounce_ready = True
-        
+    """Base platform class: a view onto one row of a PlatformStore"""
+    __slots__ = ("store", "row") # All platform state lives in the store
+    kind = REGULAR
+
+    def __init__(self, store, row):
+        """Bind the platform to its row in the store"""
+        self.store = store
+        self.row = row
+
+    id = _column("ids")
+    x = _column("x")
+    prev_x = _column("prev_x") # X at the start of the last step (for render interpolation)
+    width = _column("width")
+    height = _column("height")
+    last_collision_time = _column("last_collision_time") # Track when last collision occurred
+    colliding = _flag(COLLIDING)
+    bounce_ready = _flag(BOUNCE_READY)
+
+    @property
+    def y(self):
+        """World Y coordinate"""
+        return self.store.y[self.row].item()
+
+    @y.setter
+    def y(self, value):
+        # Through the store, so the Y index follows the platform
+        self.store.set_y(self.row, value)
+
+    @property
+    def color(self):
+        """Platform color, derived from its kind (and wear)"""
+        archetype = ARCHETYPES[self.kind]
+        if archetype.components & DURABILITY and self.store.jumps_remaining[self.row] == 1:
+            return archetype.worn_color
+        return archetype.color
+
     def on_collision(self, player):
         """Handle collision with player"""
-        self.colliding = True
-        self.collision_timer = 0
-        self.bounce_ready = False  # Mark as not ready for bounce until reset
-        self.last_collision_time = pygame.time.get_ticks()
-        pass
+        self.store.touch(self.row, game_clock.get_ticks())
+
+    def should_remove(self):
+        """Check if platform should be removed"""
+        return self.store.worn_out(self.row)
 
+    # update() is done for all platforms at once by PlatformStore.update,
+    # and timers (highlight, bounce cooldown) fire from its timer queue
     # draw() method removed as Map.draw handles platform drawing
-        
+
 class MovingPlatform(Platform):
     """Platform that moves horizontally"""
-    
-    def __init__(self, x, y, width, height, color=None, speed=None):
-        """Initialize moving platform"""
-        super().__init__(x, y, width, height, color or BLUE)
-        self.speed = speed or random.uniform(1, 3)
-        self.direction = random.choice([-1, 1])
-        self.start_x = x # Not currently used, but might be useful for defined paths
-        self.game = None  # Reference to game object for sound effects
-        
-    def set_game(self, game):
-        """Set reference to game object for sound effects"""
-        self.game = game
-        
-    def update(self, camera_y):
-        """Update platform position"""
-        previous_direction = self.direction
-        self.x += self.speed * self.direction
-        
-        # Using SCREEN_WIDTH directly from constants for boundary check
-        if self.x <= 0:
-            self.x = 0
-            self.direction = 1
-            self._play_movement_sound()
-        elif self.x + self.width >= SCREEN_WIDTH:
-            self.x = SCREEN_WIDTH - self.width
-            self.direction = -1
-            self._play_movement_sound()
-            
-        super().update(camera_y)
-        
-    def _play_movement_sound(self):
-        """Play sound when platform changes direction"""
-        if self.game and hasattr(self.game, 'sound_manager'):
-            self.game.sound_manager.play_game_sound("platform_move")
-        
-    # draw() method removed
-        
+    __slots__ = ()
+    kind = MOVING
+
+    speed = _column("speed")
+    direction = _column("direction")
+
 class DisappearingPlatform(Platform):
     """Platform that disappears after player jumps from it"""
-    
-    def __init__(self, x, y, width, height, color=None, jumps=None):
-        """Initialize disappearing platform"""
-        super().__init__(x, y, width, height, color or (255, 200, 0)) # Orange
-        self.jumps_remaining = jumps or 1
-        self.original_color = self.color # Store the initial color for multi-jump platforms
-    
-    def on_collision(self, player):
-        """Handle collision with player"""
-        self.jumps_remaining -= 1
-        self.colliding = True
-        self.collision_timer = 0
-        
-    def should_remove(self):
-        """Check if platform should be removed"""
-        return self.jumps_remaining <= 0
-
-    def update(self, camera_y):
-        # Update color based on remaining jumps (example for 2 jumps)
-        if self.jumps_remaining == 2:
-             self.color = self.original_color # Or a specific color for 2 jumps left
-        elif self.jumps_remaining == 1:
-            # Change color to indicate one jump left, if not already the final color
-            if self.original_color != (200, 150, 0): # Avoid re-coloring if it started dark
-                 self.color = (200, 150, 0) # Darker orange/yellow
-        elif self.jumps_remaining <= 0:
-            # Could make it more transparent or a different color before removal
-            pass # Removal is handled by Map class based on should_remove()
-        
-        super().update(camera_y)
-        
-    # draw() method removed
-        
+    __slots__ = ()
+    kind = DISAPPEARING
+
+    jumps_remaining = _column("jumps_remaining")
+
 class DangerousPlatform(Platform):
     """Platform that causes player to die"""
-    
-    def __init__(self, x, y, width, height, color=None):
-        """Initialize dangerous platform"""
-        super().__init__(x, y, width, height, color or RED)
-    
-    # on_collision and update are inherited or simple pass-through
-    # draw() method removed 
\ No newline at end of file
+    __slots__ = ()
+    kind = DANGEROUS
+
+# Platform class for each kind, indexed by the kind value
+PLATFORM_CLASSES = (Platform, MovingPlatform, DisappearingPlatform, DangerousPlatform)
@@ -0,0 +1,379 @@
+"""
+Platform store for Jumping Ball Game.
+Keeps every platform of a map in contiguous NumPy columns (structure of arrays)
+so the per-frame work - moving platforms, culling, collision filtering
+and finding the highest platform - runs as vectorized array operations.
+Platform objects are lightweight views onto a row of the store. Collision
+highlights and bounce cooldowns are scheduled on a timer heap instead of
+being polled every frame.
+
+The columns are the components of an entity-component layout and a row's
+kind is its archetype (see platform.ARCHETYPES). Systems pick the rows they
+work on by component - moving rows for motion, durable rows for wear - with
+one table lookup over a whole column, never by branching on a kind.
+"""
+
+import heapq
+import numpy as np
+from src.constants import SCREEN_WIDTH
+from src.platform import (ALIVE, COLLIDING, BOUNCE_READY, MOTION, DURABILITY, COOLDOWN, KIND_COMPONENTS,
+                          KIND_NAMES, ARCHETYPES, PLATFORM_CLASSES, has_component)
+from src.spatial_index import YIndex
+
+# Time a platform stays highlighted after a collision (6 frames at 60 FPS)
+COLLISION_HIGHLIGHT_MS = 100
+
+# Time before a platform can bounce the player again
+BOUNCE_COOLDOWN_MS = 300
+
+# Scheduled timer events
+CLEAR_HIGHLIGHT = 0
+REARM_BOUNCE = 1
+
+# Column name -> dtype for every per-platform column
+COLUMNS = {
+    "ids": np.int64,
+    "x": np.float64,
+    "prev_x": np.float64,
+    "y": np.float64,
+    "width": np.float64,
+    "height": np.float64,
+    "kind": np.int8,
+    "speed": np.float64,
+    "direction": np.int8,
+    "jumps_remaining": np.int16,
+    "flags": np.uint8,
+    "highlight_until": np.float64, # Time the collision highlight ends
+    "last_collision_time": np.float64,
+    "generation": np.uint32, # Bumped when a row is freed, so its pending timers are ignored
+    "step_frame": np.int64, # Frame a moving platform's x was last brought up to date
+}
+
+def advance_moving(x, speed, direction, max_x, steps):
+    """
+    Positions and directions of moving platforms `steps` frames later
+
+    A moving platform steps `speed` per frame and is clamped to the screen
+    edge (turning round) on the frame it would reach or pass it, so from an
+    edge it takes m = ceil(range / speed) frames to reach the other edge and
+    the motion repeats every 2m frames. This reproduces the frame-by-frame
+    positions exactly. Arguments broadcast, so one call can give many
+    platforms at many frames.
+
+    Returns:
+        tuple: (x, direction) arrays
+    """
+    # Frames until the first edge is reached, then frames per edge-to-edge pass
+    going_right = direction > 0
+    to_edge = np.where(going_right, max_x - x, x)
+    first_edge = np.maximum(1, np.ceil(to_edge / speed)).astype(np.int64)
+    crossing = np.maximum(1, np.ceil(max_x / speed)).astype(np.int64)
+
+    before_edge = steps < first_edge
+    new_x = x + steps * speed * direction
+
+    # Past the first edge: position within the repeating edge-to-edge motion
+    phase = (steps - first_edge) % (2 * crossing)
+    on_return = phase < crossing  # Travelling back from the first edge
+    from_right = np.where(on_return, going_right, ~going_right)
+    offset = np.where(on_return, phase, phase - crossing) * speed
+    bounced_x = np.where(from_right, max_x - offset, offset)
+    bounced_direction = np.where(from_right, -1, 1)
+
+    return np.where(before_edge, new_x, bounced_x), np.where(before_edge, direction, bounced_direction)
+
+class PlatformStore:
+    """Array-backed storage for all platforms of a map"""
+    id_counter = 0
+
+    def __init__(self, capacity=64):
+        """Create an empty store with room for `capacity` platforms before growing"""
+        self.capacity = 0
+        self.count = 0 # Rows in use so far (live or free)
+        self.free_rows = []
+        self.handles = []
+        self.index = YIndex() # Live rows ordered by world Y
+        self.frame = 0 # Frames stepped so far
+        self.timers = [] # Heap of (due time, event, row, generation) wake-ups
+        
+        # Per-kind pools of removed platform objects, reused by add()
+        self.pools = [[] for _ in PLATFORM_CLASSES]
+        self.pool_hits = [0] * len(PLATFORM_CLASSES)
+        self.pool_misses = [0] * len(PLATFORM_CLASSES)
+        self._resize(capacity)
+
+    def _resize(self, capacity):
+        """Grow every column to the new capacity, keeping existing rows"""
+        for name, dtype in COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                column[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, column)
+        self.handles.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count - len(self.free_rows)
+
+    def clear(self):
+        """Remove every platform"""
+        for handle in self.handles[:self.count]:
+            if handle is not None:
+                handle.row = None
+                self.pools[handle.kind].append(handle)
+        self.flags[:self.count] = 0
+        self.handles[:self.count] = [None] * self.count
+        self.generation[:self.count] += 1
+        self.count = 0
+        self.free_rows = []
+        self.index.clear()
+        self.timers = []
+        self.frame = 0
+
+    def add(self, kind, x, y, width, height, speed=0.0, direction=1, jumps=0, step_frame=None):
+        """
+        Add a platform and return its handle object
+
+        Rows freed by remove() are reused, and the platform object comes from the
+        pool for its kind when one is available, so steady-state generation and
+        culling allocate nothing
+
+        Args:
+            kind (int): Platform kind (its archetype, see platform.ARCHETYPES)
+            speed (float): Horizontal speed for moving platforms
+            direction (int): Initial direction for moving platforms (-1 or 1)
+            jumps (int): Jumps remaining for disappearing platforms
+            step_frame (int, optional): Frame a moving platform is at position x
+                (default: the current frame)
+        """
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            if self.count == self.capacity:
+                self._resize(self.capacity * 2)
+            row = self.count
+            self.count += 1
+
+        PlatformStore.id_counter += 1
+        self.ids[row] = PlatformStore.id_counter
+        self.x[row] = x
+        self.prev_x[row] = x
+        self.y[row] = y
+        self.width[row] = width
+        self.height[row] = height
+        self.kind[row] = kind
+        self.speed[row] = speed
+        self.direction[row] = direction
+        self.jumps_remaining[row] = jumps
+        self.flags[row] = ALIVE | BOUNCE_READY
+        self.highlight_until[row] = 0
+        self.last_collision_time[row] = 0
+        self.step_frame[row] = self.frame if step_frame is None else step_frame
+
+        self.index.insert(self.y[row].item(), row)
+
+        pool = self.pools[kind]
+        if pool:
+            handle = pool.pop()
+            handle.row = row
+            self.pool_hits[kind] += 1
+        else:
+            handle = PLATFORM_CLASSES[kind](self, row)
+            self.pool_misses[kind] += 1
+        self.handles[row] = handle
+        return handle
+
+    def remove(self, row):
+        """Remove the platform stored at `row`"""
+        self.index.remove(self.y[row].item(), row)
+        self.flags[row] = 0
+        self.generation[row] += 1
+        handle = self.handles[row]
+        handle.row = None
+        self.pools[handle.kind].append(handle)
+        self.handles[row] = None
+        self.free_rows.append(row)
+
+    def pool_stats(self):
+        """Pool hit/miss counters per platform kind name"""
+        return {name: {"hits": self.pool_hits[kind], "misses": self.pool_misses[kind]}
+                for kind, name in enumerate(KIND_NAMES)}
+
+    def with_components(self, rows, components):
+        """The rows among `rows` whose kind has every component in `components`"""
+        return rows[(KIND_COMPONENTS[self.kind[rows]] & components) == components]
+
+    def has(self, row, component):
+        """True if the platform at `row` has `component`"""
+        return bool(has_component(self.kind[row], component))
+
+    def worn_out(self, row):
+        """True if the platform at `row` wears out and has no landings left"""
+        return self.has(row, DURABILITY) and self.jumps_remaining[row] <= 0
+
+    def render_styles(self, rows):
+        """Render style of each row: its kind, or its kind plus len(ARCHETYPES) when worn down to one landing"""
+        kind = self.kind[rows]
+        worn = has_component(kind, DURABILITY) & (self.jumps_remaining[rows] == 1)
+        return kind + worn * len(ARCHETYPES)
+
+    def touch(self, row, now):
+        """A landing on the platform at `row`: highlight it, and wear it or start its bounce cooldown"""
+        components = KIND_COMPONENTS[self.kind[row]]
+        if components & DURABILITY:
+            self.jumps_remaining[row] -= 1
+        self.mark_colliding(row, now)
+        if components & COOLDOWN:
+            self.start_bounce_cooldown(row, now)  # Not ready for bounce until re-armed
+
+    def live_rows(self):
+        """Indices of all live rows"""
+        return np.flatnonzero(self.flags[:self.count] & ALIVE)
+
+    def rows_in_range(self, y0, y1):
+        """Indices of live rows with y0 <= y <= y1, found through the Y index"""
+        return self.index.query(y0, y1)
+
+    def set_y(self, row, y):
+        """Move a platform vertically, keeping the Y index up to date"""
+        old_y = self.y[row].item()
+        self.y[row] = y
+        self.index.move(row, old_y, self.y[row].item())
+
+    def shift_y(self, dy):
+        """Move every platform vertically by the same amount"""
+        self.y[:self.count] += dy
+        self.index.shift(dy)
+
+    def handle(self, row):
+        """Platform object for a row"""
+        return self.handles[row]
+
+    def update(self, now, y0, y1):
+        """
+        Step the platforms in the activation band [y0, y1] by one frame
+
+        Platforms outside the band are dormant: they are not stepped, and moving
+        platforms are brought up to date in closed form once they are needed again
+
+        Args:
+            now (float): Current simulation time in milliseconds
+            y0 (float): World Y of the top of the activation band
+            y1 (float): World Y of the bottom of the activation band
+
+        Returns:
+            bool: True if any moving platform changed direction this frame
+        """
+        self.frame += 1
+        rows = self.rows_in_range(y0, y1)
+
+        # Move moving platforms and bounce them off the screen edges
+        moving = self.with_components(rows, MOTION)
+        reversed_direction = False
+        if moving.size:
+            # Catch up platforms that have just woken up, then take this frame's step
+            self._catch_up(moving, self.frame - 1)
+            x = self.x[moving]
+            self.prev_x[moving] = x
+            x += self.speed[moving] * self.direction[moving]
+            width = self.width[moving]
+            direction = self.direction[moving]
+            left = x <= 0
+            right = ~left & (x + width >= SCREEN_WIDTH)
+            x[left] = 0
+            direction[left] = 1
+            x[right] = SCREEN_WIDTH - width[right]
+            direction[right] = -1
+            self.x[moving] = x
+            self.direction[moving] = direction
+            self.step_frame[moving] = self.frame
+            reversed_direction = bool(left.any() or right.any())
+
+        # Fire any platform timers that are due
+        self._run_timers(now)
+
+        return reversed_direction
+
+    def skip_frames(self, frames, now):
+        """
+        Advance the frame count without stepping any platform
+
+        Moving platforms catch up in closed form when they are next synced or
+        stepped, and timers that came due by `now` fire in order, so the store
+        ends up as if it had been stepped frame by frame with nothing touched
+        """
+        self.frame += frames
+        self._run_timers(now)
+
+    def mark_colliding(self, rows, now):
+        """Highlight platforms as colliding and schedule the highlight to end"""
+        self.flags[rows] |= COLLIDING
+        due = now + COLLISION_HIGHLIGHT_MS
+        self.highlight_until[rows] = due
+        for row, generation in zip(np.atleast_1d(rows).tolist(), np.atleast_1d(self.generation[rows]).tolist()):
+            heapq.heappush(self.timers, (due, CLEAR_HIGHLIGHT, row, generation))
+
+    def start_bounce_cooldown(self, row, now):
+        """Disable bouncing on a platform and schedule it to be re-armed"""
+        self.flags[row] &= ~BOUNCE_READY & 0xFF
+        self.last_collision_time[row] = now
+        # Bouncing is allowed again once more than BOUNCE_COOLDOWN_MS has passed
+        # (times are whole milliseconds)
+        heapq.heappush(self.timers, (now + BOUNCE_COOLDOWN_MS + 1, REARM_BOUNCE, row, self.generation[row].item()))
+
+    def _run_timers(self, now):
+        """Apply every scheduled timer event that is due by `now`"""
+        timers = self.timers
+        while timers and timers[0][0] <= now:
+            due, event, row, generation = heapq.heappop(timers)
+            if self.generation[row] != generation:
+                continue # The platform was removed since the timer was set
+            if event == CLEAR_HIGHLIGHT:
+                # Ignore timers superseded by a later collision
+                if self.highlight_until[row] == due:
+                    self.flags[row] &= ~COLLIDING & 0xFF
+            elif event == REARM_BOUNCE:
+                # Re-arm bounce after a short cooldown, even if player is still on platform
+                # This allows bouncing on the same platform multiple times
+                if self.last_collision_time[row] + BOUNCE_COOLDOWN_MS + 1 == due:
+                    self.flags[row] |= BOUNCE_READY
+
+    def _catch_up(self, rows, frame):
+        """Advance moving platforms to `frame` in one closed-form jump (see advance_moving)"""
+        steps = frame - self.step_frame[rows]
+        stale = steps > 0
+        if not stale.any():
+            return
+        rows = rows[stale]
+        x, direction = advance_moving(self.x[rows], self.speed[rows], self.direction[rows],
+                                      SCREEN_WIDTH - self.width[rows], steps[stale])
+        self.x[rows] = x
+        self.prev_x[rows] = x
+        self.direction[rows] = direction
+        self.step_frame[rows] = frame
+
+    def sync(self, rows):
+        """Bring dormant moving platforms among `rows` up to the current frame"""
+        moving = self.with_components(rows, MOTION)
+        if moving.size:
+            self._catch_up(moving, self.frame)
+
+    def sync_all(self):
+        """Bring every dormant moving platform up to the current frame"""
+        self.sync(self.live_rows())
+
+    def remove_below(self, limit_y):
+        """Remove every platform whose world Y is at or below `limit_y`"""
+        for row in self.index.rows_from(limit_y).tolist():
+            self.remove(row)
+
+    def highest_y(self):
+        """World Y of the highest platform (smallest y), or None if empty"""
+        return self.index.min_y()
+
+    def overlaps(self, x, y, width, y_margin):
+        """True if any live platform is within `y_margin` vertically and `width` horizontally of (x, y)"""
+        rows = self.rows_in_range(y - y_margin, y + y_margin)
+        self.sync(rows)
+        return bool(np.any((np.abs(self.y[rows] - y) < y_margin) &
+                           (np.abs(self.x[rows] - x) < width)))
@@ -1,10 +1,20 @@
 import pygame
 from src.constants import BLACK, GRAVITY, JUMP_STRENGTH, MOVE_SPEED
+from src.projectiles import FIRE_INTERVAL, PROJECTILE_SPEED, PROJECTILE_DRIFT
 
 class Player:
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = (
+        "x", "y", "prev_x", "prev_y", "radius", "color",
+        "vel_x", "vel_y", "is_jumping", "on_ground", "jump_strength", "gravity", "move_speed",
+        "auto_jump_cooldown", "auto_jump_enabled", "game", "landing_sound_played", "shoot_cooldown"
+    )
+    
     def __init__(self, x, y, radius=15, speed=None, jump_strength=None):
         self.x = x
         self.y = y  # World Y coordinate
+        self.prev_x = x  # Position at the start of the last step (for render interpolation)
+        self.prev_y = y
         self.radius = radius
         self.color = BLACK
         
@@ -21,6 +31,9 @@ class Player:
         self.auto_jump_cooldown = 0
         self.auto_jump_enabled = True  # Flag to enable/disable auto-jumping
         
+        # Steps until the player can shoot again
+        self.shoot_cooldown = 0
+        
         # Game reference (set after creation)
         self.game = None
         
@@ -33,6 +46,9 @@ class Player:
         
     def update(self):
         """Update player position and physics (all in world coordinates)"""
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
         # Apply gravity
         self.vel_y += self.gravity
         
@@ -46,6 +62,8 @@ class Player:
         # Reset auto jump cooldown if it's active
         if self.auto_jump_cooldown > 0:
             self.auto_jump_cooldown -= 1
+        if self.shoot_cooldown > 0:
+            self.shoot_cooldown -= 1
             
         # Auto-jump when on ground and cooldown is over
         if self.auto_jump_enabled and self.on_ground and self.auto_jump_cooldown <= 0:
@@ -99,9 +117,14 @@ class Player:
         return True
         
     def shoot(self):
-        """Shoot a projectile"""
-        # Will be implemented later
-        pass
+        """Shoot a projectile upward, at most once every FIRE_INTERVAL steps"""
+        if self.shoot_cooldown > 0 or not self.game:
+            return False
+        self.shoot_cooldown = FIRE_INTERVAL
+        # Shots always outrun the ball, even while it rises
+        slot = self.game.projectiles.spawn(self.x, self.y - self.radius, self.vel_x * PROJECTILE_DRIFT,
+                                           min(self.vel_y, 0) - PROJECTILE_SPEED)
+        return slot >= 0
         
     def move_left(self):
         """Move player left"""
@@ -119,6 +142,8 @@ class Player:
             self.move_right()
         if keys[pygame.K_UP]:
             self.jump()
+        if keys[pygame.K_SPACE]:
+            self.shoot()
         
     def reset_landing_sound(self):
         """Reset the landing sound flag"""
@@ -138,10 +163,19 @@ class Player:
         # Return True if we need to trigger automatic bounce
         return True
                 
-    def draw(self, screen, camera_y):
-        """Draw the player, converting world coordinates to screen coordinates"""
-        player_screen_y = self.y - camera_y
-        pygame.draw.circle(screen, self.color, (int(self.x), int(player_screen_y)), self.radius)
+    def draw(self, screen, camera_y, alpha=1.0):
+        """Draw the player, converting world coordinates to screen coordinates
+        
+        Args:
+            alpha (float): Interpolation factor between the previous and current step
+        """
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        # Don't sweep across the screen when wrapping around the edges
+        if abs(self.x - self.prev_x) > screen.get_width() // 2:
+            x = self.x
+        player_screen_y = y - camera_y
+        pygame.draw.circle(screen, self.color, (int(x), int(player_screen_y)), self.radius)
         
     def toggle_auto_jump(self):
         """Toggle auto-jump on/off"""
@@ -171,6 +205,8 @@ class Player:
             self.x = x
         if y is not None:
             self.y = y
+        self.prev_x = self.x
+        self.prev_y = self.y
         
         # Reset physics properties
         self.vel_x = 0
@@ -181,6 +217,10 @@ class Player:
         # Reset sound and jump flags
         self.landing_sound_played = False
         self.auto_jump_cooldown = 0
+        self.shoot_cooldown = 0
+        
+        # Back to the normal color after a death
+        self.color = BLACK
         
         # Ensure auto-jump is reset to default
         self.auto_jump_enabled = True 
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Projectiles for Jumping Ball Game.
+Shots fired by the player live in a fixed-capacity pool: positions and
+velocities are NumPy arrays indexed by slot, and free slots are handed out
+and taken back through a ring buffer, so firing never allocates. Every live
+projectile is moved and culled with a few array operations per step, and all
+of them are drawn with one Surface.blits call, so hundreds in flight cost
+about as much as one.
+"""
+
+from itertools import repeat
+import numpy as np
+import pygame
+from src.constants import YELLOW
+
+# Most projectiles in flight at once; shots fired while the pool is full are dropped
+PROJECTILE_CAPACITY = 1024
+
+# Upward speed (px per step) a shot leaves the ball with, on top of the ball's own rise
+PROJECTILE_SPEED = 14
+
+# Share of the ball's sideways speed a shot keeps
+PROJECTILE_DRIFT = 0.5
+
+# Steps between shots while the fire key is held
+FIRE_INTERVAL = 3
+
+PROJECTILE_RADIUS = 4
+PROJECTILE_COLOR = YELLOW
+
+# Sprite background made transparent by a color key (cheaper to blit than per-pixel alpha)
+SPRITE_KEY = (255, 0, 255)
+
+class ProjectilePool:
+    """Fixed-capacity pool of projectiles stored as arrays"""
+
+    def __init__(self, capacity=PROJECTILE_CAPACITY):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity) # Local Y, like platforms (see Map.rebase)
+        self.vel_x = np.zeros(capacity)
+        self.vel_y = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        # Ring buffer of free slots: taken at `free_head`, returned after the last free one
+        self.free = np.arange(capacity)
+        self.free_head = 0
+        self.free_count = capacity
+
+        self.sprite = None # Drawn once, on first use
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def clear(self):
+        """Remove every projectile"""
+        self.alive[:] = False
+        self.free[:] = np.arange(self.capacity)
+        self.free_head = 0
+        self.free_count = self.capacity
+
+    def spawn(self, x, y, vel_x, vel_y):
+        """
+        Fire a projectile
+
+        Returns:
+            int: Slot of the new projectile, or -1 if the pool is full
+        """
+        if not self.free_count:
+            return -1
+        slot = self.free[self.free_head].item()
+        self.free_head = (self.free_head + 1) % self.capacity
+        self.free_count -= 1
+        self.x[slot] = x
+        self.y[slot] = y
+        self.vel_x[slot] = vel_x
+        self.vel_y[slot] = vel_y
+        self.alive[slot] = True
+        return slot
+
+    def release(self, slots):
+        """Return slots to the free ring"""
+        tail = self.free_head + self.free_count
+        self.free[(tail + np.arange(len(slots))) % self.capacity] = slots
+        self.free_count += len(slots)
+        self.alive[slots] = False
+
+    def update(self, top, bottom, width):
+        """
+        Move every projectile one step and cull the ones that left the area
+
+        Args:
+            top (float): Local Y above which projectiles are removed
+            bottom (float): Local Y below which projectiles are removed
+            width (float): World width; projectiles past either side are removed
+        """
+        if self.free_count == self.capacity:
+            return
+        live = np.flatnonzero(self.alive)
+        x = self.x[live] + self.vel_x[live]
+        y = self.y[live] + self.vel_y[live]
+        self.x[live] = x
+        self.y[live] = y
+        r = PROJECTILE_RADIUS
+        gone = (y < top - r) | (y > bottom + r) | (x < -r) | (x > width + r)
+        if gone.any():
+            self.release(live[gone])
+
+    def shift_y(self, dy):
+        """Move every projectile vertically by the same amount (see Map.rebase)"""
+        self.y += dy
+
+    def draw(self, screen, camera_y, alpha=1.0):
+        """
+        Draw every projectile with one batched blit
+
+        Args:
+            alpha (float): Interpolation factor between the previous and current step
+        """
+        if self.free_count == self.capacity:
+            return
+        if self.sprite is None:
+            self.sprite = self._make_sprite()
+        live = np.flatnonzero(self.alive)
+        # Motion is linear, so the blended position is a step back along the velocity
+        back = 1.0 - alpha
+        x = self.x[live] - self.vel_x[live] * back - PROJECTILE_RADIUS
+        y = self.y[live] - self.vel_y[live] * back - camera_y - PROJECTILE_RADIUS
+        screen.blits(zip(repeat(self.sprite), zip(x.tolist(), y.tolist())), doreturn=False)
+
+    def _make_sprite(self):
+        """The image every projectile is drawn with"""
+        sprite = pygame.Surface((PROJECTILE_RADIUS * 2, PROJECTILE_RADIUS * 2))
+        sprite.fill(SPRITE_KEY)
+        sprite.set_colorkey(SPRITE_KEY)
+        pygame.draw.circle(sprite, PROJECTILE_COLOR, (PROJECTILE_RADIUS, PROJECTILE_RADIUS), PROJECTILE_RADIUS)
+        # Match the window's pixel format when there is one
+        if pygame.display.get_surface():
+            sprite = sprite.convert()
+        return sprite
@@ -0,0 +1,189 @@
+"""
+Reachability analysis for Jumping Ball Game.
+The ball's flight after a bounce depends only on the player's jump strength,
+gravity and move speed, so it is simulated once per parameter set into a jump
+envelope: how far sideways the ball can travel before it lands on a platform
+a given distance above (or below) its launch point. Every platform pair of a
+chunk is then tested against the envelope at once with NumPy broadcasting.
+
+The world generator uses this to check each chunk as it is built and move
+platforms that cannot be reached to the nearest position that can be.
+"""
+
+from functools import lru_cache
+import numpy as np
+from src.platform import REGULAR, DANGEROUS
+
+# Bounces launch at this multiple of the jump strength (see Player.bounce)
+BOUNCE_MULTIPLIER = 1.5
+
+# How far below its launch point a landing is still simulated
+MAX_DROP = 2000
+
+# Spacing (px) of the x positions tried when moving an unreachable platform
+CANDIDATE_STEP = 2
+
+class JumpEnvelope:
+    """The ball's reach after a bounce, for one set of player physics"""
+
+    def __init__(self, jump_strength, gravity, move_speed, radius=15):
+        """
+        Args:
+            jump_strength (float): Player.jump_strength
+            gravity (float): Player.gravity
+            move_speed (float): Player.move_speed
+            radius (float): Ball radius
+        """
+        self.radius = radius
+
+        # Step the ball exactly as Player.update does, from a bounce to MAX_DROP below
+        vel_y = -jump_strength * BOUNCE_MULTIPLIER
+        height = 0.0
+        heights = []
+        while height > -MAX_DROP and gravity > 0:
+            vel_y += gravity
+            height -= vel_y
+            heights.append(height)
+        heights = np.array(heights or [0.0])
+        apex_step = int(np.argmax(heights))
+        self.apex = heights[apex_step]
+
+        # Holding a direction sets vel_x to move_speed before every step, so the
+        # ball covers move_speed px per step; friction only matters once released
+        self.move_speed = move_speed
+
+        # Falling part of the flight: heights (decreasing) and the step each is reached at
+        self._falling = -heights[apex_step:] # Increasing, for searchsorted
+        self._steps = np.arange(apex_step + 1, len(heights) + 1)
+
+    def travel(self, dy):
+        """
+        Sideways distance the ball can cover before landing dy px above its launch point
+
+        Args:
+            dy (array): Heights to land at (negative = below the launch point)
+
+        Returns:
+            array: Distance in px, -1 where the height can't be reached
+        """
+        dy = np.asarray(dy, dtype=np.float64)
+        # First falling step at or below the landing height: the feet cross it there
+        step = np.searchsorted(self._falling, -dy, side="left")
+        reachable = (dy <= self.apex) & (step < len(self._steps))
+        steps = self._steps[np.minimum(step, len(self._steps) - 1)]
+        return np.where(reachable, steps * self.move_speed, -1.0)
+
+    def reachable(self, x0, y0, w0, x1, y1, w1, world_width):
+        """
+        Whether the ball can bounce from platforms (x0, y0, w0) onto platforms (x1, y1, w1)
+
+        Arguments broadcast against each other, so passing column vectors for one
+        side and row vectors for the other tests every pair at once. The ball wraps
+        around the world edges, so the sideways gap is the shorter way round.
+        """
+        travel = self.travel(np.subtract(y0, y1))
+        # Ball center positions over each platform, from which it can launch / land
+        lo0 = np.subtract(x0, self.radius)
+        hi0 = np.add(np.add(x0, w0), self.radius)
+        lo1 = np.subtract(x1, self.radius)
+        hi1 = np.add(np.add(x1, w1), self.radius)
+        gap = None
+        for shift in (-world_width, 0, world_width):
+            shifted = np.maximum(0, np.maximum(lo1 + shift - hi0, lo0 - (hi1 + shift)))
+            gap = shifted if gap is None else np.minimum(gap, shifted)
+        return gap <= travel
+
+    def reachability_matrix(self, x, y, width, world_width):
+        """N x N matrix: entry [i, j] is True when platform j can be reached from platform i"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        width = np.asarray(width, dtype=np.float64)
+        return self.reachable(x[:, None], y[:, None], width[:, None], x[None, :], y[None, :], width[None, :],
+                              world_width)
+
+    def repair(self, platforms, entry, world_width):
+        """
+        Move platforms so every safe platform of a chunk can be climbed to
+
+        Every pair of the chunk's platforms is tested at once (see
+        reachability_matrix); a single pass from the bottom then follows the
+        climb, and only platforms that get moved have their row recomputed.
+        The top platform is never moved (and is made safe), so the next chunk
+        can rely on it without knowing how this chunk was repaired.
+
+        Args:
+            platforms (list): (kind, x, y, width, direction) tuples, bottom to top
+            entry (tuple): Platform the climb into the chunk starts from
+            world_width (float): World width
+
+        Returns:
+            tuple: (repaired platforms, number moved or changed, number still unreachable)
+        """
+        platforms = [list(p) for p in platforms]
+        moved = unreachable = 0
+        top = len(platforms) - 1
+        if top < 0:
+            return [], 0, 0
+        if platforms[top][0] == DANGEROUS:
+            platforms[top][0], platforms[top][4] = REGULAR, 1
+            moved += 1
+
+        # Node 0 is the entry platform, node j + 1 is platforms[j]
+        nodes = [entry] + platforms
+        x = np.array([p[1] for p in nodes], dtype=np.float64)
+        y = np.array([p[2] for p in nodes], dtype=np.float64)
+        width = np.array([p[3] for p in nodes], dtype=np.float64)
+        edges = self.reachability_matrix(x, y, width, world_width)
+        end = top + 1
+
+        # Platforms the climb has reached so far
+        reached = np.zeros(len(nodes), dtype=bool)
+        reached[0] = True
+
+        for j, platform in enumerate(platforms):
+            node = j + 1
+            kind = platform[0]
+            need_top = False
+            if j == top - 1:
+                # The platform below the top must lead on to it if nothing else does
+                need_top = not (reached & edges[:, end]).any()
+                if need_top and kind == DANGEROUS:
+                    platform[0], platform[4] = REGULAR, 1
+                    kind = REGULAR
+                    moved += 1
+            if kind == DANGEROUS:
+                continue
+
+            ok = (reached & edges[:, node]).any()
+            if need_top:
+                ok = ok and edges[node, end]
+            if not ok and j != top:
+                # Try every position across the world at once, keep the closest that works
+                sources = np.flatnonzero(reached)
+                candidates = np.arange(0, max(1, world_width - width[node] + 1), CANDIDATE_STEP, dtype=np.float64)
+                fits = self.reachable(x[sources, None], y[sources, None], width[sources, None],
+                                      candidates[None, :], y[node], width[node], world_width).any(axis=0)
+                if need_top:
+                    fits &= self.reachable(candidates, y[node], width[node], x[end], y[end], width[end], world_width)
+                if fits.any():
+                    new_x = candidates[fits][np.argmin(np.abs(candidates[fits] - x[node]))].item()
+                    platform[1] = int(new_x) if isinstance(platform[1], int) else new_x
+                    # Where the platform leads to changes with it
+                    x[node] = platform[1]
+                    edges[node] = self.reachable(x[node], y[node], width[node], x, y, width, world_width)
+                    moved += 1
+                    ok = True
+            if not ok:
+                unreachable += 1
+                continue
+            reached[node] = True
+        return [tuple(p) for p in platforms], moved, unreachable
+
+@lru_cache(maxsize=32)
+def jump_envelope(jump_strength, gravity, move_speed, radius=15):
+    """Jump envelope for a parameter set, computed once and shared"""
+    return JumpEnvelope(jump_strength, gravity, move_speed, radius)
+
+def envelope_for_player(player):
+    """Jump envelope matching a player's current physics"""
+    return jump_envelope(player.jump_strength, player.gravity, player.move_speed, player.radius)
@@ -59,5 +59,6 @@ class BaseRenderer:
         elif game.state_manager.is_state(GameState.HOW_TO_PLAY):
             self.how_to_play_renderer.render(game)
         
-        # Update the display
-        pygame.display.flip() 
\ No newline at end of file
+        # Update the display (headless games draw off-screen only)
+        if not game.headless:
+            pygame.display.flip()
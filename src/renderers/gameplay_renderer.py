@@ -1,26 +1,39 @@
 import pygame
 from src.constants import WHITE, BLACK
+from src import game_clock
+from src.config.settings import get_setting
 
 class GameplayRenderer:
     def __init__(self, screen):
         self.screen = screen
         self.width = screen.get_width()
         self.height = screen.get_height()
+        self.ghost_surface = None # Translucent ball drawn for the ghost, made once
     
     def render_game(self, game):
         """Render the actual gameplay"""
+        # Draw at positions blended between the last two simulation steps
+        camera_y = game.get_render_camera_y()
         if game.current_map:
-            game.current_map.draw(self.screen, game.camera_y)
+            game.current_map.draw(self.screen, camera_y, game.render_alpha)
             if game.debug_mode:
                 game.current_map.draw_platform_info(self.screen, game.camera_y)
                 font = pygame.font.SysFont(None, 24)
-                text = font.render(f"Camera Y (World): {game.camera_y:.0f}", True, BLACK)
+                text = font.render(f"Camera Y (World): {game.current_map.origin_y + game.camera_y:.0f}", True, BLACK)
                 self.screen.blit(text, (10, 130))
                 coord_text = font.render("World Y → Screen Y (World Y - Camera Y)", True, BLACK)
                 self.screen.blit(coord_text, (10, 190))
         
+        # Shots in flight
+        game.projectiles.draw(self.screen, camera_y, game.render_alpha)
+        
+        # The ghost of the best earlier run, under the player
+        ghost = game.ghost_position()
+        if ghost and game.player:
+            self._draw_ghost(ghost[0], ghost[1] - camera_y, game.player.radius)
+        
         if game.player:
-            game.player.draw(self.screen, game.camera_y)
+            game.player.draw(self.screen, camera_y, game.render_alpha)
             
             if game.debug_mode:
                 font = pygame.font.SysFont(None, 24)
@@ -49,7 +62,7 @@ class GameplayRenderer:
         # Display auto-jump toggle message if active
         if game.show_auto_jump_message:
             # Check if message should still be displayed (show for 2 seconds)
-            current_time = pygame.time.get_ticks()
+            current_time = game_clock.get_ticks()
             if current_time - game.auto_jump_message_time < 2000:  # 2000ms = 2s
                 # Create a semi-transparent background for the message
                 msg_surface = pygame.Surface((400, 80), pygame.SRCALPHA)
@@ -78,6 +91,15 @@ class GameplayRenderer:
             text = font.render("DEBUG MODE (F1 to toggle)", True, (255, 0, 0))
             self.screen.blit(text, (self.width - text.get_width() - 10, 10))
     
+    def _draw_ghost(self, x, screen_y, radius):
+        """Draw the ghost ball centered at (x, screen_y) with one blit of a cached surface"""
+        if self.ghost_surface is None or self.ghost_surface.get_width() != radius * 2:
+            self.ghost_surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            color = get_setting('GHOST', 'color', (0, 0, 0))
+            alpha = get_setting('GHOST', 'alpha', 90)
+            pygame.draw.circle(self.ghost_surface, (*color, alpha), (radius, radius), radius)
+        self.screen.blit(self.ghost_surface, (int(x) - radius, int(screen_y) - radius))
+    
     def render_pause_menu(self, game):
         """Render pause menu overlay"""
         # Semi-transparent overlay
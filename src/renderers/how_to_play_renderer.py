@@ -177,7 +177,8 @@ class HowToPlayRenderer:
         
         # --- TIPS SECTION - Refined spacing ---
         tips_title_y = current_y
-        tips_height = 70  # Fixed height for all tips
+        tips_height = 85  # Fixed height for all tips
+        tip_spacing = 22  # Tighter than other sections so three rows fit above the footer
         content_y = draw_section("Tips:", tips_title_y, tips_height)
         
         # Combined tips to save space and shorter text
@@ -185,12 +186,13 @@ class HowToPlayRenderer:
             "• Wrap around screen edges",
             "• Aim for higher platforms",
             "• Watch timing on platforms",
-            "• Toggle auto-jump styles"
+            "• Toggle auto-jump styles",
+            "• Hold SPACE to shoot"
         ]
         
-        # Draw tips in one row with two columns - better aligned
-        col1_tips = tips[:2]
-        col2_tips = tips[2:]
+        # Draw tips in two columns - better aligned
+        col1_tips = tips[:3]
+        col2_tips = tips[3:]
         
         # Column positions adjusted for better balance
         col1_x = self.left_margin + 45
@@ -198,13 +200,13 @@ class HowToPlayRenderer:
         
         # Draw first column
         for i, tip in enumerate(col1_tips):
-            line_y = content_y + (i * line_spacing)
+            line_y = content_y + (i * tip_spacing)
             text_surf = text_font.render(tip, True, (230, 230, 230))
             self.screen.blit(text_surf, (col1_x, line_y - 5))  # Adjusted y position
         
         # Draw second column
         for i, tip in enumerate(col2_tips):
-            line_y = content_y + (i * line_spacing)
+            line_y = content_y + (i * tip_spacing)
             text_surf = text_font.render(tip, True, (230, 230, 230))
             self.screen.blit(text_surf, (col2_x, line_y - 5))  # Adjusted y position
         
@@ -0,0 +1,300 @@
+"""
+Replays for Jumping Ball Game.
+A run is reproduced exactly from its world seed, map settings and the
+player's input on every simulation step, so a replay stores only those.
+
+Each step's input is a few bits (INPUT_LEFT, INPUT_RIGHT, INPUT_UP,
+INPUT_TOGGLE_AUTO_JUMP, INPUT_SHOOT). The per-step values are run-length encoded: each run
+is written as two varints, the bits that changed from the previous run (XOR)
+and the number of steps the new value lasts. Runs are ended at every
+keyframe so playback can start decoding at any keyframe.
+
+File layout:
+    b"JRPL", version byte, varint header length, JSON header
+    runs ..., end marker (0, 0)
+    footer: varint step count, varint keyframe count, (step, offset, value) varints per keyframe
+    uint32 little-endian file offset of the footer
+"""
+
+import json
+import struct
+from collections import defaultdict
+import pygame
+
+MAGIC = b"JRPL"
+# Bumped whenever seeded worlds change, since a replay only stores its seed
+VERSION = 2
+
+# Input bits recorded for each simulation step
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 4
+INPUT_TOGGLE_AUTO_JUMP = 8
+INPUT_SHOOT = 16
+
+# Bits that stand for a held key (the rest are one-off events)
+KEY_BITS = INPUT_LEFT | INPUT_RIGHT | INPUT_UP | INPUT_SHOOT
+
+# Steps between keyframes (10 seconds at 60 steps per second)
+KEYFRAME_INTERVAL = 600
+
+# Encoded bytes buffered before they are written to the stream
+FLUSH_BYTES = 4096
+
+class ReplayError(Exception):
+    """Raised when replay data is not valid"""
+    pass
+
+def input_bits(keys, toggle_auto_jump=False):
+    """Pack one step's key state into input bits"""
+    bits = 0
+    if keys[pygame.K_LEFT]:
+        bits |= INPUT_LEFT
+    if keys[pygame.K_RIGHT]:
+        bits |= INPUT_RIGHT
+    if keys[pygame.K_UP]:
+        bits |= INPUT_UP
+    if toggle_auto_jump:
+        bits |= INPUT_TOGGLE_AUTO_JUMP
+    if keys[pygame.K_SPACE]:
+        bits |= INPUT_SHOOT
+    return bits
+
+def _make_keys(bits):
+    """Key state mapping, as Player.handle_input reads it, for input bits"""
+    keys = defaultdict(bool)
+    keys[pygame.K_LEFT] = bool(bits & INPUT_LEFT)
+    keys[pygame.K_RIGHT] = bool(bits & INPUT_RIGHT)
+    keys[pygame.K_UP] = bool(bits & INPUT_UP)
+    keys[pygame.K_SPACE] = bool(bits & INPUT_SHOOT)
+    return keys
+
+# Key state for every combination of key bits, built once
+_KEYS = [_make_keys(bits) for bits in range(KEY_BITS + 1)]
+
+def keys_for_bits(bits):
+    """Key state mapping for input bits"""
+    return _KEYS[bits & KEY_BITS]
+
+def write_varint(out, value):
+    """Append an unsigned integer to a bytearray, 7 bits per byte"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    """Read an unsigned integer written by write_varint; returns (value, new position)"""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("replay data ends inside a number")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class ReplayWriter:
+    """Streams a run's input to a binary file object as it is recorded"""
+
+    def __init__(self, stream, seed, settings=None, level_path=None, physics_fps=60):
+        """
+        Args:
+            stream: Binary file object the replay is written to
+            seed (int): World seed of the run
+            settings (dict, optional): Custom settings the run was started with
+            level_path (str, optional): Level file the run was played on
+            physics_fps (int): Simulation steps per second
+        """
+        self.stream = stream
+        header = json.dumps({"seed": seed, "settings": settings, "level_path": level_path,
+                             "physics_fps": physics_fps}).encode("utf-8")
+        start = bytearray(MAGIC)
+        start.append(VERSION)
+        write_varint(start, len(header))
+        start += header
+        self.stream.write(start)
+        self.data_start = len(start)
+
+        self.buffer = bytearray()
+        self.flushed = 0 # Run bytes already written to the stream
+        self.frame = 0 # Steps recorded so far
+        self.value = 0 # Input bits of the last finished run
+        self.run_value = None # Input bits of the current run
+        self.run_length = 0
+        self.keyframes = [] # (step, run data offset, input bits before the step)
+        self.closed = False
+
+    def record(self, bits, count=1):
+        """Record input bits for `count` consecutive steps"""
+        while count:
+            if self.frame % KEYFRAME_INTERVAL == 0:
+                # Start a fresh run here so decoding can begin at this step
+                self._end_run()
+                self.run_value = None
+                self.keyframes.append((self.frame, self.flushed + len(self.buffer), self.value))
+            steps = min(count, KEYFRAME_INTERVAL - self.frame % KEYFRAME_INTERVAL)
+            if bits == self.run_value:
+                self.run_length += steps
+            else:
+                self._end_run()
+                self.run_value = bits
+                self.run_length = steps
+            self.frame += steps
+            count -= steps
+
+    def _end_run(self):
+        """Encode the current run into the buffer"""
+        if self.run_length:
+            write_varint(self.buffer, self.run_value ^ self.value)
+            write_varint(self.buffer, self.run_length)
+            self.value = self.run_value
+            self.run_length = 0
+            if len(self.buffer) >= FLUSH_BYTES:
+                self.flush()
+
+    def flush(self):
+        """Write buffered runs to the stream"""
+        self.stream.write(self.buffer)
+        self.flushed += len(self.buffer)
+        self.buffer = bytearray()
+
+    def close(self):
+        """Finish the replay: write the last run, the end marker and the keyframe footer"""
+        if self.closed:
+            return
+        self._end_run()
+        write_varint(self.buffer, 0)
+        write_varint(self.buffer, 0)
+        self.flush()
+
+        footer = bytearray()
+        write_varint(footer, self.frame)
+        write_varint(footer, len(self.keyframes))
+        for frame, offset, value in self.keyframes:
+            write_varint(footer, frame)
+            write_varint(footer, offset)
+            write_varint(footer, value)
+        footer += struct.pack("<I", self.data_start + self.flushed)
+        self.stream.write(footer)
+        self.closed = True
+
+class Replay:
+    """A decoded replay header and keyframe index over the encoded runs"""
+
+    def __init__(self, data):
+        """Parse replay bytes (the runs themselves are decoded by ReplayPlayer)"""
+        data = bytes(data)
+        if data[:4] != MAGIC:
+            raise ReplayError("not a replay file")
+        if len(data) < 9 or data[4] != VERSION:
+            raise ReplayError("unsupported replay version")
+        header_length, pos = read_varint(data, 5)
+        header = json.loads(data[pos:pos + header_length].decode("utf-8"))
+        self.seed = header["seed"]
+        self.settings = header["settings"]
+        self.level_path = header["level_path"]
+        self.physics_fps = header["physics_fps"]
+
+        self.data = data
+        self.data_start = pos + header_length
+        footer_start = struct.unpack_from("<I", data, len(data) - 4)[0]
+        self.frames, pos = read_varint(data, footer_start)
+        count, pos = read_varint(data, pos)
+        self.keyframes = []
+        for _ in range(count):
+            frame, pos = read_varint(data, pos)
+            offset, pos = read_varint(data, pos)
+            value, pos = read_varint(data, pos)
+            self.keyframes.append((frame, self.data_start + offset, value))
+        self.keyframe_steps = {frame for frame, _, _ in self.keyframes}
+
+    @classmethod
+    def load(cls, path):
+        """Read a replay file"""
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def keyframe_before(self, frame):
+        """The last keyframe at or before a step"""
+        best = (0, self.data_start, 0) # An empty replay has no keyframes
+        for keyframe in self.keyframes:
+            if keyframe[0] > frame:
+                break
+            best = keyframe
+        return best
+
+class ReplayPlayer:
+    """Input provider that feeds a replay's recorded input back to the game"""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.seek(0)
+
+    def seek(self, frame):
+        """Position the decoder so the next input returned is for step `frame`"""
+        self.frame, self.pos, self.value = self.replay.keyframe_before(frame)
+        self.remaining = 0
+        while self.frame < frame:
+            self.next_bits()
+
+    @property
+    def at_keyframe(self):
+        """True when the next step is a keyframe"""
+        return self.frame in self.replay.keyframe_steps
+
+    @property
+    def finished(self):
+        """True once every recorded step has been played"""
+        return self.frame >= self.replay.frames
+
+    def _next_run(self):
+        """Decode the next run of identical input"""
+        delta, self.pos = read_varint(self.replay.data, self.pos)
+        self.remaining, self.pos = read_varint(self.replay.data, self.pos)
+        if self.remaining == 0:
+            raise ReplayError("replay data ends before its last step")
+        self.value ^= delta
+
+    def next_bits(self):
+        """Input bits for the next step (no input once the replay has ended)"""
+        if self.finished:
+            return 0
+        if self.remaining == 0:
+            self._next_run()
+        self.remaining -= 1
+        self.frame += 1
+        return self.value
+
+    def peek(self):
+        """
+        Input bits of the next step and how many steps in a row they last
+
+        Returns:
+            tuple: (bits, steps); steps is None once the replay has ended (no input from then on)
+        """
+        if self.finished:
+            return 0, None
+        if self.remaining == 0:
+            self._next_run()
+        return self.value, self.remaining
+
+    def skip(self, steps):
+        """Consume the input of `steps` steps without returning it"""
+        while steps and not self.finished:
+            if self.remaining == 0:
+                self._next_run()
+            taken = min(steps, self.remaining)
+            self.remaining -= taken
+            self.frame += taken
+            steps -= taken
+
+    def __call__(self, game):
+        """Game.input_provider hook: key state for this step"""
+        bits = self.next_bits()
+        if bits & INPUT_TOGGLE_AUTO_JUMP:
+            game.pending_auto_jump_toggle = True
+        return keys_for_bits(bits)
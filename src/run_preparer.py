@@ -0,0 +1,173 @@
+"""
+Run preparation for Jumping Ball Game.
+Starting a run needs a player and a map with its first screen of platforms
+built and its chunk worker running. While a menu waits for the next run to be
+picked (Game Over, the map lists) the preparer builds the run that menu would
+start on a background thread, so confirming only swaps the prepared player and
+map in. A build starts once the menu's choice has stayed the same for a moment,
+so dragging a custom map slider doesn't start one per frame.
+
+Nothing is thrown away between runs: the player and platform store of a run
+that ends (or of a prepared run that wasn't picked) are kept as spares, and the
+next run is built in them. A reused store keeps its arrays and pooled
+platform objects, so a warmed-up game allocates almost nothing to start a run.
+"""
+
+import json
+import threading
+import time
+from src.constants import GRAVITY, JUMP_STRENGTH, MOVE_SPEED
+from src.level_file import LevelFile
+from src.map import Map
+from src.player import Player
+from src.reachability import envelope_for_player
+
+# Seconds the run a menu would start must stay the same before it is built
+PREPARE_DELAY = 0.25
+
+def player_physics(custom_settings):
+    """Move speed, jump strength and gravity of a run's player"""
+    if custom_settings:
+        return (custom_settings.get("player_speed", 5), custom_settings.get("jump_strength", 10),
+                custom_settings.get("gravity", 0.5))
+    return MOVE_SPEED, JUMP_STRENGTH, GRAVITY
+
+def run_key(custom_settings, seed):
+    """What makes two runs start the same: their settings and requested seed"""
+    return json.dumps(custom_settings, sort_keys=True, default=str), seed
+
+class RunPreparer:
+    """Builds players and maps for new runs, ahead of time when it can"""
+
+    def __init__(self, game):
+        """
+        Args:
+            game (Game): Game the runs are built for
+        """
+        self.game = game
+        self.prepared = None # (key, player, map) of the run built ahead of time
+        self.worker = None # Thread building the next run, if one is running
+        self.built = None # (key, player, map) handed back by the worker
+        self.wanted = None # (key, time it was first asked for) of the run menus want
+        self.spare_players = []
+        self.spare_stores = []
+
+    def prepare(self, custom_settings, seed=None):
+        """
+        Build a run in the background so starting it later is instant
+
+        Called every menu frame. Does nothing while a build is running or once
+        the run is built, and waits PREPARE_DELAY after the run asked for changes
+
+        Args:
+            custom_settings (dict): Settings the run will be started with
+            seed (int, optional): Seed it will be started with; None is a random world
+        """
+        key = run_key(custom_settings, seed)
+        now = time.perf_counter()
+        if self.wanted is None or self.wanted[0] != key:
+            self.wanted = (key, now)
+        self._collect()
+        if self.worker or (self.prepared and self.prepared[0] == key):
+            return
+        if now - self.wanted[1] < PREPARE_DELAY:
+            return
+        self.discard()
+        # Menus keep changing their settings dict, so the worker gets its own copy
+        settings = dict(custom_settings) if custom_settings else custom_settings
+        self.worker = threading.Thread(target=self._work, args=(key, settings, seed),
+                                       name="run-preparer", daemon=True)
+        self.worker.start()
+
+    def _work(self, key, custom_settings, seed):
+        """Worker thread: build a run and hand it back"""
+        player, current_map = self.build(custom_settings, seed)
+        self.built = (key, player, current_map)
+
+    def _collect(self, wait=False):
+        """Move the worker's finished run into `prepared` (waiting for it if `wait`)"""
+        if self.worker is None:
+            return
+        if wait:
+            self.worker.join()
+        elif self.worker.is_alive():
+            return
+        self.worker = None
+        if self.built:
+            self.prepared, self.built = self.built, None
+
+    def take(self, custom_settings, seed=None, level_path=None):
+        """
+        Player and map for a new run: the prepared ones if they match, else built now
+
+        Args:
+            custom_settings (dict): Settings the run is started with
+            seed (int, optional): World seed; a random one is chosen if not given
+            level_path (str, optional): .jlvl level file to load the layout from (never prepared)
+
+        Returns:
+            tuple: (Player, Map) ready to play
+        """
+        # Spares and the prepared run are only touched here once the worker is done
+        self._collect(wait=True)
+        if level_path is None and self.prepared and self.prepared[0] == run_key(custom_settings, seed):
+            _, player, current_map = self.prepared
+            self.prepared = None
+            return player, current_map
+        return self.build(custom_settings, seed, level_path)
+
+    def recycle(self, player, current_map):
+        """Keep the player and platform store of a run that is over for the next one"""
+        if player is not None:
+            self.spare_players.append(player)
+        if current_map is not None:
+            current_map.close()
+            self.spare_stores.append(current_map.store)
+
+    def discard(self):
+        """Drop the prepared run, keeping its objects as spares"""
+        self._collect(wait=True)
+        if self.prepared:
+            _, player, current_map = self.prepared
+            self.prepared = None
+            self.recycle(player, current_map)
+
+    def build(self, custom_settings, seed=None, level_path=None):
+        """Set up a player and a map with its first screen generated, reusing spares"""
+        player = self.build_player(custom_settings)
+
+        # Pre-built layout, if one was given
+        level = LevelFile(level_path) if level_path else None
+
+        # Keep generated platforms within the player's jump reach
+        envelope = envelope_for_player(player)
+
+        # Create map with default or custom settings
+        store = self.spare_stores.pop() if self.spare_stores else None
+        current_map = Map(
+            settings=custom_settings,
+            seed=seed,
+            level=level,
+            envelope=envelope,
+            # World Y of the goal; None climbs forever
+            target_height=(custom_settings or {}).get("target_height", -5000),
+            store=store
+        )
+
+        # Set game reference in map for sound effects
+        current_map.set_game(self.game)
+
+        # Generate initial platforms
+        current_map.generate_map()
+        return player, current_map
+
+    def build_player(self, custom_settings):
+        """A player at the start position with the run's physics, reusing a spare one"""
+        game = self.game
+        player = self.spare_players.pop() if self.spare_players else Player(game.width // 2, game.height - 100)
+        player.move_speed, player.jump_strength, player.gravity = player_physics(custom_settings)
+        player.reset(x=game.width // 2, y=game.height - 100)
+
+        # Set game reference in player for sound effects
+        player.set_game(game)
+        return player
@@ -0,0 +1,201 @@
+"""
+Game state snapshots for Jumping Ball Game.
+A snapshot is the whole state of a run at the end of a simulation step -
+player, camera, score, clock, platform store (columns, Y index order, free
+rows and timer heap), the chunks taken from the generator and the platforms
+still queued, and the replay and ghost recorded so far - packed into one binary blob:
+a JSON header with the scalars followed by the raw array data.
+
+The world itself is not stored. Chunks are rebuilt from (seed, chunk index)
+whenever they are needed, so a snapshot only holds the few dozen platforms
+that are live, and the generator has no random state to save. Restoring
+writes everything back into the game's existing map and store, reusing
+their arrays and platform objects, so it takes a fraction of a millisecond.
+"""
+
+import json
+from array import array
+import numpy as np
+from src.game_state import GameState
+from src.ghost import GhostRecorder
+from src.platform import PLATFORM_CLASSES
+from src.platform_store import COLUMNS, PlatformStore
+from src.replay import write_varint, read_varint
+
+MAGIC = b"JSNP"
+VERSION = 1
+
+# Player attributes a snapshot keeps (everything but the game reference)
+PLAYER_FIELDS = ("x", "y", "prev_x", "prev_y", "radius", "color", "vel_x", "vel_y", "is_jumping",
+                 "on_ground", "jump_strength", "gravity", "move_speed", "auto_jump_cooldown",
+                 "auto_jump_enabled", "landing_sound_played", "shoot_cooldown")
+
+# Pending platform timers (see PlatformStore.timers)
+TIMER = np.dtype([("due", "<f8"), ("event", "<i8"), ("row", "<i8"), ("generation", "<i8")])
+
+class SnapshotError(Exception):
+    """Raised when a snapshot can't be read or doesn't belong to the running game"""
+
+def take_snapshot(game):
+    """
+    Capture the state of the game's current run
+
+    Returns:
+        bytes: Snapshot blob for restore_snapshot
+    """
+    player = game.player
+    current_map = game.current_map
+    store = current_map.store
+    writer = game.replay_writer
+    count = store.count
+
+    index_rows = np.array(store.index._rows, dtype=np.int64)
+    queued = np.array(current_map.queued, dtype=np.float64).reshape(-1, 5)
+    timers = np.array([tuple(timer) for timer in store.timers], dtype=TIMER)
+    recorded = writer.stream.getvalue()[:writer.data_start + writer.flushed]
+    ghost = game.ghost_recorder
+
+    header = {
+        "seed": current_map.seed,
+        "player": {name: getattr(player, name) for name in PLAYER_FIELDS},
+        "camera_y": game.camera_y,
+        "prev_camera_y": game.prev_camera_y,
+        "time_ms": game.sim_clock.time_ms,
+        "state": game.state_manager.current_state.name,
+        "score": game.state_manager.get_state_data("score"),
+        "reason": game.state_manager.get_state_data("reason"),
+        "pending_auto_jump_toggle": game.pending_auto_jump_toggle,
+        "map": {"origin_y": current_map.origin_y, "loaded_chunks": current_map.loaded_chunks},
+        "store": {"count": count, "frame": store.frame, "free_rows": store.free_rows,
+                  "id_counter": PlatformStore.id_counter, "index": len(index_rows),
+                  "queued": len(queued), "timers": len(timers)},
+        "replay": {"data_start": writer.data_start, "frame": writer.frame, "value": writer.value, "run_value": writer.run_value,
+                   "run_length": writer.run_length, "keyframes": writer.keyframes,
+                   "recorded": len(recorded), "buffer": len(writer.buffer)},
+        "ghost": {"tick": ghost.tick, "samples": len(ghost.x)} if ghost else None,
+    }
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    blob = bytearray(MAGIC)
+    blob.append(VERSION)
+    write_varint(blob, len(encoded))
+    blob += encoded
+    for name in COLUMNS:
+        blob += getattr(store, name)[:count].tobytes()
+    blob += index_rows.tobytes()
+    blob += queued.tobytes()
+    blob += timers.tobytes()
+    blob += recorded
+    blob += writer.buffer
+    if ghost:
+        blob += ghost.x.tobytes()
+        blob += ghost.y.tobytes()
+    return bytes(blob)
+
+def restore_snapshot(game, data):
+    """
+    Put the game back in the state a snapshot was taken in
+
+    A snapshot taken during play resumes playing; one taken once the run had
+    ended goes back to the game over state
+
+    The game must be running the same world (same seed) the snapshot was taken in
+
+    Args:
+        game (Game): Game whose run the snapshot was taken from (or one set up
+            by init_game with the same settings and seed)
+        data (bytes): Blob from take_snapshot
+    """
+    data = memoryview(data)
+    if bytes(data[:4]) != MAGIC:
+        raise SnapshotError("not a snapshot")
+    if len(data) < 6 or data[4] != VERSION:
+        raise SnapshotError("unsupported snapshot version")
+    header_length, pos = read_varint(data, 5)
+    header = json.loads(bytes(data[pos:pos + header_length]))
+    pos += header_length
+
+    current_map = game.current_map
+    if current_map is None or current_map.seed != header["seed"]:
+        raise SnapshotError("snapshot belongs to a different world")
+
+    def take(length):
+        """Next `length` bytes of the blob"""
+        nonlocal pos
+        chunk = data[pos:pos + length]
+        if len(chunk) < length:
+            raise SnapshotError("snapshot data is truncated")
+        pos += length
+        return chunk
+
+    # Platform store: columns, then rebuild the Y index and handles from them
+    store = current_map.store
+    meta = header["store"]
+    count = meta["count"]
+    store.clear()
+    if store.capacity < count:
+        store._resize(max(count, store.capacity * 2))
+    for name, dtype in COLUMNS.items():
+        getattr(store, name)[:count] = np.frombuffer(take(count * np.dtype(dtype).itemsize), dtype=dtype)
+    store.count = count
+    store.frame = meta["frame"]
+    store.free_rows = meta["free_rows"]
+    PlatformStore.id_counter = max(PlatformStore.id_counter, meta["id_counter"])
+    index_rows = np.frombuffer(take(meta["index"] * 8), dtype=np.int64)
+    store.index._rows = index_rows.tolist()
+    store.index._ys = store.y[index_rows].tolist()
+    for row, kind in zip(store.index._rows, store.kind[index_rows].tolist()):
+        pool = store.pools[kind]
+        handle = pool.pop() if pool else PLATFORM_CLASSES[kind](store, row)
+        handle.row = row
+        store.handles[row] = handle
+    queued = np.frombuffer(take(meta["queued"] * 5 * 8), dtype=np.float64).reshape(-1, 5)
+    timers = np.frombuffer(take(meta["timers"] * TIMER.itemsize), dtype=TIMER)
+    store.timers = [(due, event, row, generation) for due, event, row, generation in timers.tolist()]
+
+    # Chunks taken so far and platforms still to add
+    current_map.origin_y = header["map"]["origin_y"]
+    current_map.loaded_chunks = header["map"]["loaded_chunks"]
+    current_map.queued.clear()
+    current_map.queued.extend((int(kind), x, y, width, int(direction))
+                              for kind, x, y, width, direction in queued.tolist())
+    if current_map.prefetcher:
+        current_map.prefetcher.rewind(current_map.loaded_chunks[-1])
+        current_map.prefetch_chunks()
+
+    # Replay recorded up to the snapshot; recording carries on from there
+    writer = game.replay_writer
+    meta = header["replay"]
+    recorded = take(meta["recorded"])
+    writer.stream.seek(0)
+    writer.stream.truncate()
+    writer.stream.write(recorded)
+    writer.data_start = meta["data_start"]
+    writer.flushed = meta["recorded"] - writer.data_start
+    writer.buffer = bytearray(take(meta["buffer"]))
+    writer.frame = meta["frame"]
+    writer.value = meta["value"]
+    writer.run_value = meta["run_value"]
+    writer.run_length = meta["run_length"]
+    writer.keyframes = [tuple(keyframe) for keyframe in meta["keyframes"]]
+    writer.closed = False
+
+    # Ghost samples recorded up to the snapshot
+    game.ghost_recorder = None
+    if header["ghost"]:
+        samples = header["ghost"]["samples"]
+        game.ghost_recorder = GhostRecorder(header["ghost"]["tick"])
+        game.ghost_recorder.x = array("H", take(samples * 2))
+        game.ghost_recorder.y = array("i", take(samples * 4))
+
+    player = game.player
+    for name, value in header["player"].items():
+        setattr(player, name, tuple(value) if name == "color" else value)
+    game.camera_y = header["camera_y"]
+    game.prev_camera_y = header["prev_camera_y"]
+    game.sim_clock.time_ms = header["time_ms"]
+    game.pending_auto_jump_toggle = header["pending_auto_jump_toggle"]
+    game.state_manager.change_state(GameState[header["state"]])
+    game.state_manager.set_state_data("score", header["score"])
+    if header["reason"] is not None:
+        game.state_manager.set_state_data("reason", header["reason"])
@@ -169,4 +169,36 @@ class SoundManager:
             ui=sfx_volume,
             gameplay=sfx_volume,
             music=music_volume
-        ) 
\ No newline at end of file
+        ) 
+
+class NullSoundManager(SoundManager):
+    """Silent sound manager for headless runs and games without an audio device; never touches pygame.mixer."""
+    
+    def __init__(self, game):
+        """Initialize the null sound manager without opening an audio device."""
+        self.game = game
+        self.enabled = False
+        self.music_enabled = False
+        self.sfx_enabled = False
+        self.current_music = None
+    
+    def play_sound(self, sound_name):
+        return None
+    
+    def play_music(self, music_name, loops=-1):
+        pass
+    
+    def stop_music(self):
+        self.current_music = None
+    
+    def pause_music(self):
+        pass
+    
+    def unpause_music(self):
+        pass
+    
+    def update_volume(self, master=None, sfx=None, music=None):
+        pass
+    
+    def cleanup(self):
+        pass
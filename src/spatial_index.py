@@ -0,0 +1,65 @@
+"""
+Spatial index for Jumping Ball Game.
+Keeps platform rows ordered by world Y so range queries ("platforms between
+y0 and y1") cost O(log n + k) instead of a scan over every platform.
+"""
+
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+class YIndex:
+    """Platform rows sorted by world Y, maintained incrementally"""
+
+    def __init__(self):
+        # Parallel lists: _ys is sorted, _rows[i] is the store row at _ys[i]
+        self._ys = []
+        self._rows = []
+
+    def __len__(self):
+        return len(self._ys)
+
+    def clear(self):
+        """Remove every entry"""
+        self._ys = []
+        self._rows = []
+
+    def insert(self, y, row):
+        """Add a row at world Y"""
+        i = bisect_right(self._ys, y)
+        self._ys.insert(i, y)
+        self._rows.insert(i, row)
+
+    def remove(self, y, row):
+        """Remove a row previously inserted at world Y"""
+        i = bisect_left(self._ys, y)
+        while self._rows[i] != row:
+            i += 1
+        del self._ys[i]
+        del self._rows[i]
+
+    def move(self, row, old_y, new_y):
+        """Re-position a row whose world Y changed"""
+        self.remove(old_y, row)
+        self.insert(new_y, row)
+
+    def shift(self, dy):
+        """Move every entry by the same amount (the order is unchanged)"""
+        self._ys = [y + dy for y in self._ys]
+
+    def query(self, y0, y1):
+        """Rows with y0 <= y <= y1, ordered from highest to lowest platform"""
+        lo = bisect_left(self._ys, y0)
+        hi = bisect_right(self._ys, y1)
+        return np.array(self._rows[lo:hi], dtype=np.intp)
+
+    def rows_from(self, y0):
+        """Rows with y >= y0 (the platforms at or below a world Y)"""
+        return np.array(self._rows[bisect_left(self._ys, y0):], dtype=np.intp)
+
+    def min_y(self):
+        """Smallest world Y (the highest platform), or None if empty"""
+        return self._ys[0] if self._ys else None
+
+    def max_y(self):
+        """Largest world Y (the lowest platform), or None if empty"""
+        return self._ys[-1] if self._ys else None
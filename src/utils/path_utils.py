@@ -8,4 +8,14 @@ def resource_path(relative_path):
     except AttributeError:
         base_path = os.path.abspath(".")
 
-    return os.path.join(base_path, relative_path) 
\ No newline at end of file
+    return os.path.join(base_path, relative_path) 
+
+
+def data_path(relative_path):
+    """ Get absolute path to saved game data: the project root in dev, next to the executable when packaged """
+    if getattr(sys, "frozen", False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    return os.path.join(base_path, relative_path)
@@ -0,0 +1,238 @@
+"""
+World generator for Jumping Ball Game.
+Builds the world as fixed-height chunks stacked upwards. Each chunk is made
+only from (seed, chunk index, map settings) with its own random generator,
+so chunks can be generated on demand, thrown away once they scroll off
+screen and regenerated identically later.
+
+All of a chunk's platforms are drawn together: one NumPy call gives the x,
+kind, width and direction draws of every row, kinds are picked from
+precomputed cumulative weights, and rows that would overlap are dropped with
+array comparisons.
+
+Given a jump envelope, each chunk is checked as it is built and platforms the
+ball can't reach are moved (see src/reachability.py). Repairs never move a
+chunk's top platform, so a chunk still depends only on its own random draws
+and the unrepaired top platform of the chunk below.
+"""
+
+import random
+import zlib
+import numpy as np
+from src.constants import PLATFORM_WIDTH, PLATFORM_HEIGHT, PLATFORM_COUNT
+from src.platform import REGULAR, MOVING, DISAPPEARING, DANGEROUS, MOTION, has_component
+
+# Vertical distance between platform rows above the starter chunk
+ROW_GAP = 70
+
+# Platform kind weights used above the starter chunk
+STREAM_KIND_WEIGHTS = (0.7, 0.15, 0.1, 0.05)  # More regular platforms
+
+KINDS = (REGULAR, MOVING, DISAPPEARING, DANGEROUS)
+KIND_CODES = np.array(KINDS)
+
+# Platforms closer than this vertically may overlap (see WorldGenerator._overlapped)
+OVERLAP_MARGIN = PLATFORM_HEIGHT * 2
+
+def cumulative_weights(weights):
+    """Cumulative kind weights scaled to end at 1, to sample kinds with searchsorted"""
+    cdf = np.cumsum(np.asarray(weights, dtype=np.float64))
+    if cdf[-1] <= 0:
+        # No weights: every platform is regular
+        return np.ones(len(weights))
+    return cdf / cdf[-1]
+
+STREAM_KIND_CDF = cumulative_weights(STREAM_KIND_WEIGHTS)
+
+def seed_for_map(map_id):
+    """Stable world seed for an official map id, the same on every run and machine"""
+    return zlib.crc32(map_id.encode("utf-8"))
+
+def random_seed():
+    """Fresh world seed for a custom or random map"""
+    return random.randrange(2 ** 32)
+
+class Chunk:
+    """Platforms of one world chunk, as (kind, x, y, width, direction) tuples"""
+    __slots__ = ("index", "top", "bottom", "platforms")
+
+    def __init__(self, index, top, bottom, platforms):
+        self.index = index
+        self.top = top # World Y of the top edge (smallest y)
+        self.bottom = bottom # World Y of the bottom edge
+        self.platforms = platforms
+
+class WorldGenerator:
+    """Generates world chunks for one seed and map configuration"""
+
+    def __init__(self, seed, width, height, platform_density=2.0, kind_weights=(1.0, 0.0, 0.0, 0.0),
+                 platforms_per_chunk=10, starter_count=10, envelope=None):
+        """
+        Args:
+            seed (int): World seed
+            width (int): World (screen) width
+            height (int): Screen height; the starter chunk sits at the bottom of the first screen
+            platform_density (float): Higher = starter platforms closer together
+            kind_weights (tuple): Weights of regular, moving, disappearing and dangerous starter platforms
+            platforms_per_chunk (int): Platform rows in each chunk above the starter chunk
+            starter_count (int): Jumpable platforms in the starter chunk
+            envelope (JumpEnvelope, optional): Player reach to repair unreachable platforms with
+        """
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.kind_weights = kind_weights
+        self.platforms_per_chunk = max(1, platforms_per_chunk)
+        self.starter_count = starter_count
+
+        # Calculate vertical gap based on platform density
+        # Higher density = smaller gap
+        base_gap = 70  # Default gap
+        vertical_gap = int(base_gap / platform_density)
+        self.starter_gap = max(40, min(100, vertical_gap))  # Constrain between 40-100
+
+        # The player starts at height - 100; the first jumpable platform is one gap above
+        self.player_start_y = height - 100
+        self.starter_top = self.player_start_y - starter_count * self.starter_gap
+        self.chunk_height = self.platforms_per_chunk * ROW_GAP
+
+        # Everything about a chunk's layout except its random draws is the same for
+        # every chunk, so it is worked out once: the x range of each row's screen
+        # section and each row's height
+        section_width = width // 3
+        section = np.arange(starter_count) % 3
+        self._starter_layout = (section * section_width + 20,
+                                np.maximum(1, section_width - 139),
+                                self.player_start_y - (np.arange(starter_count) + 1) * self.starter_gap)
+        self._starter_cdf = cumulative_weights(kind_weights)
+        section = np.arange(self.platforms_per_chunk) % 3
+        lo = np.array((50, section_width + 50, 2 * section_width + 50))[section]
+        hi = np.array((section_width - 50, 2 * section_width - 50, width - 150))[section]
+        self._stream_layout = (lo, np.maximum(1, hi - lo + 1), (np.arange(self.platforms_per_chunk) + 1) * ROW_GAP)
+
+        self.envelope = envelope
+        self.repaired_platforms = 0 # Platforms moved so they can be reached
+        self.unreachable_platforms = 0 # Platforms no position could make reachable
+
+    def _rng(self, index):
+        """Random generator for one chunk, independent of every other chunk"""
+        return np.random.default_rng((self.seed, index))
+
+    def chunk_top(self, index):
+        """World Y of the top edge of a chunk"""
+        if index <= 0:
+            return self.starter_top
+        return self.starter_top - index * self.chunk_height
+
+    def chunk_bottom(self, index):
+        """World Y of the bottom edge of a chunk"""
+        if index <= 0:
+            return self.height
+        return self.chunk_top(index - 1)
+
+    def chunk_index_at(self, y):
+        """Index of the chunk containing world Y"""
+        if y >= self.starter_top:
+            return 0
+        return -int((y - self.starter_top) // self.chunk_height)
+
+    def generate_chunk(self, index):
+        """Generate the platforms of a chunk; the same index always gives the same chunk"""
+        platforms = self._raw_platforms(index)
+        if self.envelope:
+            if index == 0:
+                # The climb starts on the starter platform, which stays where it is
+                entry, platforms = platforms[0], platforms[1:]
+            else:
+                entry = self._raw_platforms(index - 1)[-1]
+            repaired, moved, unreachable = self.envelope.repair(platforms, entry, self.width)
+            self.repaired_platforms += moved
+            self.unreachable_platforms += unreachable
+            platforms = [entry] + repaired if index == 0 else repaired
+        return Chunk(index, self.chunk_top(index), self.chunk_bottom(index), platforms)
+
+    def _raw_platforms(self, index):
+        """A chunk's platforms as drawn from its random generator, before any repair"""
+        if index == 0:
+            return self._starter_platforms(self._rng(0))
+        return self._stream_platforms(self._rng(index), self.chunk_top(index - 1))
+
+    def _place(self, rng, lo, span, y, width_lo, width_span, cdf):
+        """
+        Draw every platform of a chunk at once
+
+        Args:
+            rng (Generator): The chunk's random generator
+            lo, span (array): Range of x for each platform (lo .. lo + span - 1)
+            y (array): World Y of each platform, bottom to top
+            width_lo, width_span (int): Range of platform widths
+            cdf (array): Cumulative kind weights, normalized to end at 1
+
+        Returns:
+            list: (kind, x, y, width, direction) tuples, bottom to top
+        """
+        # One draw per platform for each of x, kind, width and direction
+        draws = rng.random((4, len(y)))
+        x = lo + (draws[0] * span).astype(np.int64)
+        kind = KIND_CODES[np.minimum(np.searchsorted(cdf, draws[1], side="right"), len(KINDS) - 1)]
+        width = width_lo + (draws[2] * width_span).astype(np.int64)
+        # Only moving platforms start in a random direction
+        direction = np.where(has_component(kind, MOTION) & (draws[3] < 0.5), -1, 1)
+
+        keep = ~self._overlapped(x, y, width)
+        return list(zip(kind[keep].tolist(), x[keep].tolist(), y[keep].tolist(),
+                        width[keep].tolist(), direction[keep].tolist()))
+
+    def _overlapped(self, x, y, width):
+        """
+        Platforms too close to a higher platform of the same chunk
+
+        Rows are sorted by height, so each platform is only compared with the
+        few rows above it that are within the overlap margin. The higher platform
+        is kept, so a chunk's top platform is never dropped.
+        """
+        overlapped = np.zeros(len(y), dtype=bool)
+        for offset in range(1, len(y)):
+            close = np.abs(y[:-offset] - y[offset:]) < OVERLAP_MARGIN
+            if not close.any():
+                break
+            overlapped[:-offset] |= close & (np.abs(x[:-offset] - x[offset:]) < width[offset:])
+        return overlapped
+
+    def _starter_platforms(self, rng):
+        """Chunk 0: the starter platform and the first, density-spaced platforms"""
+        # Create a starter platform at the bottom
+        starter = (REGULAR, self.width // 2 - 50, self.height - 50, PLATFORM_WIDTH, 1)
+        lo, span, y = self._starter_layout
+        return [starter] + self._place(rng, lo, span, y, PLATFORM_WIDTH, 1, self._starter_cdf)
+
+    def _stream_platforms(self, rng, bottom_y):
+        """A chunk above the starter chunk: rows at a fixed gap, alternating screen sections"""
+        lo, span, offsets = self._stream_layout
+        return self._place(rng, lo, span, bottom_y - offsets, 80, 41, STREAM_KIND_CDF)
+
+def world_generator_for(settings, seed, width, height, envelope=None):
+    """
+    World generator for a run's map settings, built the same way for live runs and baked levels
+
+    Args:
+        settings (dict, optional): Map settings as passed to Game.init_game; missing keys use the defaults
+        seed (int): World seed
+        width (int): World (screen) width
+        height (int): Screen height
+        envelope (JumpEnvelope, optional): Player reach to repair unreachable platforms with
+
+    Returns:
+        WorldGenerator: Generator for the run's world
+    """
+    settings = settings or {}
+    moving = settings.get("moving_platform_pct", 25) / 100.0
+    disappearing = settings.get("disappearing_platform_pct", 15) / 100.0
+    dangerous = settings.get("dangerous_platform_pct", 10) / 100.0
+    return WorldGenerator(
+        seed, width, height,
+        platform_density=settings.get("platform_density", 2.0),
+        kind_weights=(max(0, 1.0 - moving - disappearing - dangerous), moving, disappearing, dangerous),
+        platforms_per_chunk=settings.get("platform_count_per_generation", 10),
+        starter_count=PLATFORM_COUNT,
+        envelope=envelope)
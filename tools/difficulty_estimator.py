@@ -0,0 +1,218 @@
+"""
+Difficulty estimator for Jumping Ball Game map configs.
+Plays many seeded headless runs of a config with a scripted climbing policy,
+spread over a process pool, and reports how far runs get and how they end.
+Results are cached per config, so asking again about the same config is instant.
+
+Run from the project root:
+    python -m tools.difficulty_estimator --map map1 --runs 2000
+    python -m tools.difficulty_estimator --settings '{"gravity": 0.9, "dangerous_platform_pct": 30}'
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.platform import HAZARD
+from src.replay import INPUT_LEFT, INPUT_RIGHT, keys_for_bits
+from tools.make_level import official_map_configs
+
+# Settings init_game reads, with the values it falls back to
+DEFAULT_SETTINGS = {
+    "gravity": 0.5,
+    "player_speed": 5,
+    "jump_strength": 10,
+    "platform_density": 2.0,
+    "moving_platform_pct": 25,
+    "disappearing_platform_pct": 15,
+    "dangerous_platform_pct": 10,
+    "platform_count_per_generation": 10,
+    "target_height": -5000,
+}
+
+# Bump when the policy or the simulation changes so old cached results are not reused
+POLICY_VERSION = 5
+
+# Don't steer when the ball is this close (px) to the target's center
+STEER_DEADZONE = 10
+
+# Heights at which the survival curve is reported, as fractions of the map's goal height
+SURVIVAL_MARKS = 10
+
+CACHE_DIR = os.path.join(".cache", "difficulty")
+
+def normalize_settings(settings):
+    """Settings as init_game sees them: only the keys it reads, defaults filled in"""
+    settings = settings or {}
+    return {key: settings.get(key, default) for key, default in DEFAULT_SETTINGS.items()}
+
+def config_hash(settings, runs, frames, base_seed):
+    """Cache key for an estimate"""
+    key = json.dumps({"settings": normalize_settings(settings), "runs": runs, "frames": frames,
+                      "base_seed": base_seed, "policy": POLICY_VERSION}, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+class ClimbPolicy:
+    """
+    Scripted player used as Game.input_provider.
+    While rising it steers under the highest safe platform it can reach; while
+    falling it steers onto the nearest safe platform below. Dangerous platforms
+    are never targeted. Auto-jump stays on, so it only presses left and right.
+    """
+
+    def __call__(self, game):
+        player = game.player
+        store = game.current_map.store
+        feet = player.y + player.radius
+
+        if player.vel_y < 0:
+            # Bounces launch at 1.5x jump strength; aim a little short of the apex
+            reach = (player.jump_strength * 1.5) ** 2 / (2 * player.gravity) * 0.9
+            # Look at the platforms up there even if the map hasn't spliced them in yet
+            game.current_map.ensure_platforms(feet - reach)
+            rows = store.rows_in_range(feet - reach, feet)
+            prefer_high = True
+        else:
+            rows = store.rows_in_range(feet, game.camera_y + game.height)
+            prefer_high = False
+
+        target = None
+        for row in rows.tolist():
+            if store.has(row, HAZARD):
+                continue
+            y = store.y[row]
+            if target is None or (y < target[0]) == prefer_high:
+                target = (y, store.x[row] + store.width[row] / 2)
+        if target is None:
+            return keys_for_bits(0)
+
+        # Steer the short way round, since the ball wraps at the screen edges
+        dx = (target[1] - player.x + game.width / 2) % game.width - game.width / 2
+        if dx > STEER_DEADZONE:
+            return keys_for_bits(INPUT_RIGHT)
+        if dx < -STEER_DEADZONE:
+            return keys_for_bits(INPUT_LEFT)
+        return keys_for_bits(0)
+
+# Game instance reused by every run in a worker process
+_game = None
+
+def _init_worker():
+    """Create one headless game per worker process"""
+    global _game
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from src.game import Game
+    pygame.init()
+    _game = Game(headless=True)
+    _game.input_provider = ClimbPolicy()
+
+def _play(task):
+    """Play one seeded run; returns (steps survived, height reached, end reason)"""
+    settings, seed, frames = task
+    result = _game.run_headless(frames, custom_settings=settings, seed=seed)
+    return result["frames"], result["score"], result["reason"]
+
+def estimate(settings, runs=1000, frames=3600, base_seed=0, workers=None):
+    """
+    Play `runs` headless runs of a config and summarize them
+
+    Args:
+        settings (dict): Map settings as passed to init_game(custom_settings=...)
+        runs (int): Number of runs, seeded base_seed, base_seed + 1, ...
+        frames (int): Step limit per run
+        base_seed (int): World seed of the first run
+        workers (int, optional): Worker processes (default: one per CPU)
+
+    Returns:
+        dict: Median height and steps, end reason counts and the survival curve
+    """
+    settings = normalize_settings(settings)
+    tasks = [(settings, base_seed + i, frames) for i in range(runs)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        results = list(pool.map(_play, tasks, chunksize=max(1, runs // 64)))
+
+    heights = [height for _, height, _ in results]
+    reasons = {}
+    for _, _, reason in results:
+        reason = reason or "Timeout"
+        reasons[reason] = reasons.get(reason, 0) + 1
+
+    # Fraction of runs that climbed at least each mark, up to the goal height
+    # (or, on an endless map, the highest any run climbed)
+    goal = settings["target_height"]
+    target = abs(goal) if goal is not None else max(heights, default=0)
+    survival = []
+    for i in range(SURVIVAL_MARKS + 1):
+        mark = target * i // SURVIVAL_MARKS
+        survival.append((mark, sum(height >= mark for height in heights) / runs))
+
+    return {
+        "settings": settings,
+        "runs": runs,
+        "frames": frames,
+        "median_height": statistics.median(heights),
+        "median_steps": statistics.median(steps for steps, _, _ in results),
+        "reasons": reasons,
+        "survival": survival,
+    }
+
+def cached_estimate(settings, runs=1000, frames=3600, base_seed=0, workers=None, cache_dir=CACHE_DIR):
+    """estimate(), answered from the cache when the same config was estimated before"""
+    path = os.path.join(cache_dir, config_hash(settings, runs, frames, base_seed) + ".json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f), True
+    result = estimate(settings, runs=runs, frames=frames, base_seed=base_seed, workers=workers)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f)
+    return result, False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate how hard a map config is with scripted headless runs")
+    parser.add_argument("--map", dest="map_id", default=None, help="official map id whose settings to use")
+    parser.add_argument("--settings", default=None, help="map settings as a JSON object (overrides --map values)")
+    parser.add_argument("--runs", type=int, default=1000, help="number of seeded runs")
+    parser.add_argument("--frames", type=int, default=3600, help="step limit per run")
+    parser.add_argument("--base-seed", type=int, default=0, help="seed of the first run")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="where results are cached")
+    args = parser.parse_args(argv)
+
+    settings = {}
+    label = None
+    if args.map_id:
+        configs = official_map_configs()
+        if args.map_id not in configs:
+            print(f"Unknown map '{args.map_id}', choose from: {', '.join(configs)}")
+            return
+        settings.update(configs[args.map_id]["config"])
+        label = configs[args.map_id]["difficulty"]
+    if args.settings:
+        settings.update(json.loads(args.settings))
+
+    start = time.perf_counter()
+    result, cached = cached_estimate(settings, runs=args.runs, frames=args.frames, base_seed=args.base_seed,
+                                     workers=args.workers, cache_dir=args.cache_dir)
+    elapsed = time.perf_counter() - start
+
+    print(f"Settings:       {json.dumps(result['settings'])}")
+    if label:
+        print(f"Labelled:       {label}")
+    print(f"Runs:           {result['runs']} ({'cached' if cached else f'{elapsed:.1f}s'})")
+    print(f"Median height:  {result['median_height']:.0f}")
+    print(f"Median steps:   {result['median_steps']:.0f} of {result['frames']}")
+    reasons = ", ".join(f"{reason} {count / result['runs']:.1%}" for reason, count in sorted(result["reasons"].items()))
+    print(f"Run ends:       {reasons}")
+    print("Survival (share of runs reaching each height):")
+    for mark, share in result["survival"]:
+        print(f"  {mark:>6}  {share:6.1%}  {'#' * round(share * 40)}")
+
+if __name__ == "__main__":
+    main()
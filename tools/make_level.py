@@ -0,0 +1,69 @@
+"""
+Level baking tool for Jumping Ball Game.
+Pre-generates a world into a .jlvl level file that the game can load
+instead of generating platforms while it runs.
+
+Run from the project root:
+    python -m tools.make_level --map map1 --chunks 200 -o levels/map1.jlvl
+"""
+
+import argparse
+import time
+
+from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from src.level_file import write_level, LevelFile
+from src.player import Player
+from src.reachability import envelope_for_player
+from src.renderers.map_selection_renderer import MapSelectionRenderer
+from src.run_preparer import player_physics
+from src.world_generator import world_generator_for, seed_for_map, random_seed
+
+class _Screen:
+    """Stand-in screen so the official map configs can be read without pygame.display"""
+    def get_width(self):
+        return SCREEN_WIDTH
+
+    def get_height(self):
+        return SCREEN_HEIGHT
+
+def official_map_configs():
+    """The official maps' entries (name, difficulty, config, ...) by map id"""
+    return MapSelectionRenderer(_Screen()).map_configs
+
+def make_generator(map_id, seed):
+    """World generator for an official map's settings, or the default settings"""
+    config = official_map_configs()[map_id]["config"] if map_id else None
+
+    # The same player physics Game.init_game sets up, so the same platforms get repaired
+    player = Player(0, 0)
+    player.move_speed, player.jump_strength, player.gravity = player_physics(config)
+    return world_generator_for(config, seed, SCREEN_WIDTH, SCREEN_HEIGHT, envelope_for_player(player))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate a world into a .jlvl level file")
+    parser.add_argument("-o", "--output", required=True, help="level file to write")
+    parser.add_argument("--map", dest="map_id", default=None, help="official map id whose settings to use")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="world seed (default: the official map's seed, else random)")
+    parser.add_argument("--chunks", type=int, default=100, help="number of chunks to generate")
+    args = parser.parse_args(argv)
+
+    seed = args.seed
+    if seed is None:
+        seed = seed_for_map(args.map_id) if args.map_id else random_seed()
+    generator = make_generator(args.map_id, seed)
+
+    chunks = [generator.generate_chunk(index) for index in range(args.chunks)]
+    write_level(args.output, chunks, seed=seed)
+
+    start = time.perf_counter()
+    level = LevelFile(args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {level.records.size} platforms in {level.chunk_count} chunks to {args.output} "
+          f"(seed {seed}, top at y={level.chunk_top(level.chunk_count - 1):.0f}, opened in {elapsed * 1000:.2f} ms)")
+    print(f"Reachability: {generator.repaired_platforms} platforms moved, "
+          f"{generator.unreachable_platforms} could not be made reachable")
+    level.close()
+
+if __name__ == "__main__":
+    main()
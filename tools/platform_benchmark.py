@@ -0,0 +1,94 @@
+"""
+Platform memory and throughput benchmark for Jumping Ball Game.
+Reports how many bytes each platform costs and how fast platforms can be
+created and recycled the way Map.update / generate_more_platforms do.
+
+Run from the project root:
+    python -m tools.platform_benchmark --count 100000
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.constants import PLATFORM_HEIGHT
+from src.platform import REGULAR, MOVING, DISAPPEARING, DANGEROUS
+from src.platform_store import PlatformStore, COLUMNS
+from src.player import Player
+
+KINDS = (REGULAR, MOVING, DISAPPEARING, DANGEROUS)
+
+def _fill(store, count, rng):
+    """Add `count` random platforms to a store, stacked upwards"""
+    for i in range(count):
+        store.add(rng.choice(KINDS), rng.randint(0, 700), -i * 70, rng.randint(80, 120),
+                  PLATFORM_HEIGHT, speed=2, direction=1, jumps=1)
+
+def measure_memory(count):
+    """Bytes per platform: column storage, handle object and the total traced allocation"""
+    rng = random.Random(0)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = PlatformStore(capacity=count)
+    _fill(store, count, rng)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    column_bytes = sum(np.dtype(dtype).itemsize for dtype in COLUMNS.values())
+    handle_bytes = sys.getsizeof(store.handle(0))
+    return {
+        "columns": column_bytes,
+        "handle": handle_bytes,
+        "traced": (after - before) / count,
+        "player": sys.getsizeof(Player(0, 0)),
+    }
+
+def measure_creation(count):
+    """Platforms created per second into an empty store"""
+    rng = random.Random(0)
+    store = PlatformStore()
+    start = time.perf_counter()
+    _fill(store, count, rng)
+    return count / (time.perf_counter() - start)
+
+def measure_churn(count, live=60, batch=10):
+    """Platforms created per second while culling from the bottom, as a long climb does"""
+    rng = random.Random(0)
+    store = PlatformStore()
+    _fill(store, live, rng)
+    top = store.highest_y()
+    created = 0
+    start = time.perf_counter()
+    while created < count:
+        for i in range(batch):
+            top -= 70
+            store.add(rng.choice(KINDS), rng.randint(0, 700), top, rng.randint(80, 120),
+                      PLATFORM_HEIGHT, speed=2, direction=1, jumps=1)
+        store.remove_below(top + live * 70)
+        created += batch
+    return created / (time.perf_counter() - start), store
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Platform memory and throughput benchmark")
+    parser.add_argument("--count", type=int, default=100000, help="platforms to create")
+    args = parser.parse_args(argv)
+
+    memory = measure_memory(args.count)
+    print(f"Column storage:      {memory['columns']} bytes/platform")
+    print(f"Handle object:       {memory['handle']} bytes/platform")
+    print(f"Traced allocation:   {memory['traced']:.1f} bytes/platform (store + handles + index)")
+    print(f"Player object:       {memory['player']} bytes")
+
+    print(f"Creation:            {measure_creation(args.count):,.0f} platforms/s")
+    churn_rate, store = measure_churn(args.count)
+    print(f"Create/cull churn:   {churn_rate:,.0f} platforms/s (store capacity stayed at {store.capacity} rows)")
+    hits = sum(store.pool_hits)
+    misses = sum(store.pool_misses)
+    print(f"Object pool:         {hits} hits, {misses} misses ({hits / max(1, hits + misses):.1%} reused)")
+
+if __name__ == "__main__":
+    main()